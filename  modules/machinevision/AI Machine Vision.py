@@ -1,4 +1,14 @@
 import cv2
+import sys
+import time
+
+from frame_bus import open_frame_source, frame_is_current, publish_results
+
+# --- 0. Run mode ---
+# --bus      : read frames from the shared frame bus (start frame_bus.py first)
+# --headless : skip drawing and windows, publish recognition results instead
+USE_BUS = "--bus" in sys.argv
+HEADLESS = "--headless" in sys.argv
 
 # --- 1. Load the recognizer and the trainer data ---
 recognizer = cv2.face.LBPHFaceRecognizer_create()
@@ -15,55 +25,87 @@ face_cascade = cv2.CascadeClassifier(cascade_file)
 # IMPORTANT: Index 0 is a dummy value since our IDs start at 1
 names = ['None', 'Surya', 'Patrick', 'Mohamed', 'Shaymaa', 'Khush']  # <-- CHANGE THESE to match your IDs
 
-# --- 4. Initialize Webcam ---
-cap = cv2.VideoCapture(1)
-print("Starting webcam... Press 'q' to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-    faces = face_cascade.detectMultiScale(
-        gray,
-        scaleFactor=1.1,
-        minNeighbors=5,
-        minSize=(30, 30)
-    )
-
-    for (x, y, w, h) in faces:
-        # --- 5. THIS IS THE RECOGNITION STEP ---
-        # The recognizer.predict() function returns the ID and a "confidence" score
-        id, confidence = recognizer.predict(gray[y:y + h, x:x + w])
-
-        # --- 6. Check the confidence score ---
-        # The LBPH recognizer gives a *lower* score for a *better* match.
-        # A score < 50-60 is a good match. > 80-90 is a bad match.
-        if confidence < 70:
-            # We have a match! Get the name from our 'names' list
-            display_name = names[id]
-            text_color = (255, 0, 0)  # Green for a match
-            confidence_text = f"{round(100 - confidence)}% Match"
-        else:
-            # No match
-            display_name = "Unknown"
-            text_color = (0, 0, 255)  # Red for unknown
-            confidence_text = f"{round(100 - confidence)}% Match"
-
-        # --- 7. Draw the rectangle and text ---
-        cv2.rectangle(frame, (x, y), (x + w, y + h), text_color, 2)
-        cv2.putText(frame, display_name, (x, y - 35), cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color, 2)
-        #cv2.putText(frame, confidence_text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-    # Display the result
-    cv2.imshow('Facial Recognition', frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+# --- 4. Initialize Webcam (or attach to the frame bus) ---
+# Bus frames are read-only shared memory that the publisher reuses after
+# BUS_SLOTS - 1 newer frames: nothing is copied, the frame is checked after use
+cap = open_frame_source(USE_BUS, 1)
+if HEADLESS:
+    print("Starting headless recognition... Press Ctrl+C to quit.")
+else:
+    print("Starting webcam... Press 'q' to quit.")
+
+frame_count = 0
+
+try:
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_count += 1
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if not HEADLESS:
+            frame = frame.copy()  # we draw on it
+        if not frame_is_current(cap):
+            continue  # overwritten while we converted it; take the next one
+
+        faces = face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(30, 30)
+        )
+
+        results = []
+        for (x, y, w, h) in faces:
+            # --- 5. THIS IS THE RECOGNITION STEP ---
+            # The recognizer.predict() function returns the ID and a "confidence" score
+            id, confidence = recognizer.predict(gray[y:y + h, x:x + w])
+
+            # --- 6. Check the confidence score ---
+            # The LBPH recognizer gives a *lower* score for a *better* match.
+            # A score < 50-60 is a good match. > 80-90 is a bad match.
+            if confidence < 70:
+                # We have a match! Get the name from our 'names' list
+                display_name = names[id]
+                text_color = (255, 0, 0)  # Green for a match
+                confidence_text = f"{round(100 - confidence)}% Match"
+            else:
+                # No match
+                display_name = "Unknown"
+                text_color = (0, 0, 255)  # Red for unknown
+                confidence_text = f"{round(100 - confidence)}% Match"
+
+            results.append({
+                "id": int(id) if confidence < 70 else None,
+                "name": display_name,
+                "match": round(100 - confidence),
+                "box": [int(x), int(y), int(w), int(h)],
+            })
+
+            if HEADLESS:
+                continue
+
+            # --- 7. Draw the rectangle and text ---
+            cv2.rectangle(frame, (x, y), (x + w, y + h), text_color, 2)
+            cv2.putText(frame, display_name, (x, y - 35), cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color, 2)
+            #cv2.putText(frame, confidence_text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        if HEADLESS:
+            # --- 8. Publish the result instead of rendering it ---
+            publish_results({"frame": frame_count, "time": time.time(), "faces": results})
+            continue
+
+        # Display the result
+        cv2.imshow('Facial Recognition', frame)
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+except KeyboardInterrupt:
+    pass
 
 # Clean up
 cap.release()
-cv2.destroyAllWindows()
+if not HEADLESS:
+    cv2.destroyAllWindows()
 print("Webcam feed closed.")
\ No newline at end of file
@@ -1,5 +1,14 @@
 import cv2
 import os
+import sys
+import time
+
+from frame_bus import open_frame_source, frame_is_current
+
+# --bus      : read frames from the shared frame bus (start frame_bus.py first)
+# --headless : skip drawing and windows, just report progress
+USE_BUS = "--bus" in sys.argv
+HEADLESS = "--headless" in sys.argv
 
 # Create a folder to store the data
 dataset_folder = 'dataset'
@@ -10,8 +19,8 @@ if not os.path.exists(dataset_folder):
 cascade_file = "haarcascade_frontalface_default.xml"
 face_cascade = cv2.CascadeClassifier(cascade_file)
 
-# Initialize webcam
-cap = cv2.VideoCapture(1)
+# Initialize webcam (or attach to the frame bus; its frames are shared, so they are checked after use)
+cap = open_frame_source(USE_BUS, 1)
 
 # --- IMPORTANT ---
 # Get a unique ID for the person
@@ -25,13 +34,16 @@ while count < 30:
     if not ret:
         break
 
+    # The grayscale conversion is our own copy: it is what gets saved, so it must not be torn
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if not HEADLESS:
+        frame = frame.copy()  # we draw on it
+    if not frame_is_current(cap):
+        continue
+
     faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
 
     for (x, y, w, h) in faces:
-        # Draw rectangle
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
         # Increment sample count
         count += 1
 
@@ -40,9 +52,21 @@ while count < 30:
         file_name = f"{dataset_folder}/User.{user_id}.{count}.jpg"
         cv2.imwrite(file_name, gray[y:y + h, x:x + w])
 
+        if HEADLESS:
+            print(f"Samples: {count}")
+            continue
+
+        # Draw rectangle
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
         # Show the face count on the video feed
         cv2.putText(frame, f"Samples: {count}", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
+    if HEADLESS:
+        # Wait 100ms between captures, same pacing as the windowed mode
+        time.sleep(0.1)
+        continue
+
     cv2.imshow('Data Gatherer', frame)
 
     # Wait 100ms
@@ -50,5 +74,6 @@ while count < 30:
         break
 
 cap.release()
-cv2.destroyAllWindows()
+if not HEADLESS:
+    cv2.destroyAllWindows()
 print(f"Done. Collected {count} samples for user {user_id}.")
\ No newline at end of file
@@ -0,0 +1,389 @@
+import os
+import sys
+import json
+import time
+import struct
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# --- FRAME BUS CONFIGURATION ---
+# One process owns the camera and publishes every frame into a shared-memory
+# ring buffer. Any number of consumers attach to the same buffer by name and
+# read frames in place (no copy, no second VideoCapture on the device).
+BUS_NAME = "alex_frame_bus"
+BUS_SLOTS = 4           # ring size: a frame stays valid for BUS_SLOTS - 1 newer frames
+DEFAULT_CAMERA = 1
+DEFAULT_FPS = 15.0
+BUS_MAX_PAUSE = 30.0    # seconds a target_fps of 0 lasts unless the controller renews it
+VISION_NICE = 10        # fixed niceness for every bus process, so the assistant's stages come first
+RESULTS_FILE = "vision_results.json"
+
+# Header layout (little endian):
+#   magic, slots, height, width, channels, owner pid  -> 6 x uint32
+#   write_seq                                         -> uint64
+#   target_fps                                        -> float64
+#   consumer controls: OpenCV threads                 -> int32 (0 = leave as is)
+#   pause deadline (time.time())                      -> float64
+HEADER_FORMAT = "<6IQd"
+CONTROL_FORMAT = "<i"
+HEADER_SIZE = 64
+SLOT_HEADER_FORMAT = "<Qd"  # slot seq, capture timestamp (time.monotonic)
+SLOT_HEADER_SIZE = 16
+BUS_MAGIC = 0xA1E7F0B5
+
+_SEQ_OFFSET = struct.calcsize("<6I")
+_FPS_OFFSET = _SEQ_OFFSET + 8
+_CONTROL_OFFSET = _FPS_OFFSET + 8
+_PAUSE_OFFSET = _CONTROL_OFFSET + struct.calcsize(CONTROL_FORMAT)
+
+
+def _slot_offset(index, frame_bytes):
+    return HEADER_SIZE + index * (SLOT_HEADER_SIZE + frame_bytes)
+
+
+# --- PUBLISHER (camera owner) ---
+class FrameBus:
+    """
+    Owns the shared-memory ring buffer. Frames are written with a sequence
+    number; the slot seq is cleared while a frame is being written so readers
+    never mistake a half-written slot for a complete one.
+    """
+
+    def __init__(self, shape, name=BUS_NAME, slots=BUS_SLOTS, target_fps=DEFAULT_FPS):
+        height, width, channels = shape
+        self.name = name
+        self.slots = slots
+        self.shape = (height, width, channels)
+        self.frame_bytes = height * width * channels
+        size = _slot_offset(slots, self.frame_bytes)
+
+        # Clean up a stale bus left behind by a crashed owner
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        struct.pack_into(HEADER_FORMAT, self.shm.buf, 0,
+                         BUS_MAGIC, slots, height, width, channels, os.getpid(),
+                         0, float(target_fps))
+        struct.pack_into(CONTROL_FORMAT, self.shm.buf, _CONTROL_OFFSET, 0)
+        struct.pack_into("<d", self.shm.buf, _PAUSE_OFFSET, 0.0)
+        self.seq = 0
+        self._frames = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                       offset=_slot_offset(i, self.frame_bytes) + SLOT_HEADER_SIZE)
+            for i in range(slots)
+        ]
+
+    @property
+    def target_fps(self):
+        return struct.unpack_from("<d", self.shm.buf, _FPS_OFFSET)[0]
+
+    @target_fps.setter
+    def target_fps(self, fps):
+        struct.pack_into("<d", self.shm.buf, _FPS_OFFSET, float(fps))
+
+    def pause_expired(self):
+        """True once a pause has gone BUS_MAX_PAUSE seconds without being renewed (its controller died)."""
+        return struct.unpack_from("<d", self.shm.buf, _PAUSE_OFFSET)[0] < time.time()
+
+    @property
+    def controls(self):
+        return struct.unpack_from(CONTROL_FORMAT, self.shm.buf, _CONTROL_OFFSET)
+
+    def publish(self, frame):
+        """Copies one frame into the next ring slot and returns its sequence number."""
+        seq = self.seq + 1
+        index = seq % self.slots
+        offset = _slot_offset(index, self.frame_bytes)
+
+        struct.pack_into(SLOT_HEADER_FORMAT, self.shm.buf, offset, 0, 0.0)
+        np.copyto(self._frames[index], frame)
+        struct.pack_into(SLOT_HEADER_FORMAT, self.shm.buf, offset, seq, time.monotonic())
+        struct.pack_into("<Q", self.shm.buf, _SEQ_OFFSET, seq)
+
+        self.seq = seq
+        return seq
+
+    def close(self):
+        self._frames = []
+        self.shm.close()
+        self.shm.unlink()
+
+
+# --- CONSUMER ---
+class FrameBusReader:
+    """
+    Attaches to a running FrameBus. Frames are returned as read-only numpy
+    views into shared memory; call is_current(seq) after processing (or copy
+    the frame) if you need to be sure the slot was not overwritten meanwhile.
+    """
+
+    def __init__(self, name=BUS_NAME, attach_timeout=10.0):
+        deadline = time.monotonic() + attach_timeout
+        while True:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+        # Readers must not unlink the segment when they exit (Python < 3.13
+        # registers every attach with the resource tracker).
+        try:
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        except Exception:
+            pass
+
+        magic, slots, height, width, channels, pid, _, _ = struct.unpack_from(HEADER_FORMAT, self.shm.buf, 0)
+        if magic != BUS_MAGIC:
+            self.shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a frame bus.")
+
+        self.slots = slots
+        self.shape = (height, width, channels)
+        self.owner_pid = pid
+        self.frame_bytes = height * width * channels
+        self._frames = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                       offset=_slot_offset(i, self.frame_bytes) + SLOT_HEADER_SIZE)
+            for i in range(slots)
+        ]
+        for frame in self._frames:
+            frame.flags.writeable = False
+
+    @property
+    def latest_seq(self):
+        return struct.unpack_from("<Q", self.shm.buf, _SEQ_OFFSET)[0]
+
+    @property
+    def target_fps(self):
+        return struct.unpack_from("<d", self.shm.buf, _FPS_OFFSET)[0]
+
+    @target_fps.setter
+    def target_fps(self, fps):
+        """
+        Lets a consumer ask the owner to publish faster or slower. 0 pauses,
+        for at most BUS_MAX_PAUSE seconds unless it is set again.
+        """
+        if fps <= 0:
+            struct.pack_into("<d", self.shm.buf, _PAUSE_OFFSET, time.time() + BUS_MAX_PAUSE)
+        struct.pack_into("<d", self.shm.buf, _FPS_OFFSET, float(fps))
+
+    def owner_alive(self):
+        try:
+            os.kill(self.owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @property
+    def controls(self):
+        """(cv_threads,) requested for every process on the bus; 0 means no change."""
+        return struct.unpack_from(CONTROL_FORMAT, self.shm.buf, _CONTROL_OFFSET)
+
+    def set_controls(self, cv_threads=0):
+        """Asks the owner and all consumers to use this many OpenCV threads."""
+        struct.pack_into(CONTROL_FORMAT, self.shm.buf, _CONTROL_OFFSET, int(cv_threads))
+
+    def _slot_seq(self, seq):
+        offset = _slot_offset(seq % self.slots, self.frame_bytes)
+        return struct.unpack_from(SLOT_HEADER_FORMAT, self.shm.buf, offset)
+
+    def is_current(self, seq):
+        """True while the slot holding `seq` has not been reused by a newer frame."""
+        return self._slot_seq(seq)[0] == seq
+
+    def wait_next(self, last_seq=0, timeout=1.0):
+        """
+        Blocks until a frame newer than last_seq is published.
+        Returns (seq, timestamp, frame) for the newest frame, or None on timeout.
+        Intermediate frames are skipped so slow consumers never fall behind.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            seq = self.latest_seq
+            if seq > last_seq:
+                slot_seq, timestamp = self._slot_seq(seq)
+                if slot_seq == seq:
+                    return seq, timestamp, self._frames[seq % self.slots]
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(0.002)
+
+    def close(self):
+        self._frames = []
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with the process
+            pass
+
+
+class ControlFollower:
+    """Applies the bus's OpenCV thread count to this process whenever it changes."""
+
+    def __init__(self):
+        self.applied = (0,)
+
+    def apply(self, controls):
+        if controls == self.applied:
+            return
+        cv_threads, = controls
+        if cv_threads > 0:
+            import cv2
+            cv2.setNumThreads(cv_threads)
+        self.applied = controls
+
+
+def lower_priority(nice=VISION_NICE):
+    """
+    Renices every thread of this process to `nice`, once at startup. Linux
+    niceness is per thread and OpenCV's workers may already be running;
+    threads started later inherit it. Niceness is only ever raised, which
+    needs no privileges (lowering it again would need CAP_SYS_NICE, so it
+    is not changed per phase).
+    """
+    if nice <= 0 or not hasattr(os, "setpriority"):
+        return
+    try:
+        tids = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        tids = [0]  # not Linux: the calling process
+    for tid in tids:
+        try:
+            if os.getpriority(os.PRIO_PROCESS, tid) < nice:
+                os.setpriority(os.PRIO_PROCESS, tid, nice)
+        except OSError:
+            pass  # the thread exited meanwhile
+
+
+class BusCapture:
+    """
+    Drop-in replacement for cv2.VideoCapture backed by the frame bus, so the
+    existing scripts keep their read()/release() loop. With copy=False the
+    frame is a live, read-only slot: check frame_is_current() after using it
+    and copy only what has to outlive the loop iteration.
+    """
+
+    def __init__(self, name=BUS_NAME, copy=False, timeout=2.0, nice=VISION_NICE):
+        self.reader = FrameBusReader(name)
+        lower_priority(nice)
+        self.copy = copy
+        self.timeout = timeout
+        self.last_seq = 0
+        self.controls = ControlFollower()
+
+    def read(self):
+        self.controls.apply(self.reader.controls)
+        while True:
+            item = self.reader.wait_next(self.last_seq, self.timeout)
+            if item is None:
+                if self.reader.target_fps <= 0 and self.reader.owner_alive():
+                    # Paused by the governor (e.g. during transcription), not the end of the stream
+                    continue
+                return False, None
+            self.last_seq, _, frame = item
+            if not self.copy:
+                return True, frame
+            frame = frame.copy()
+            if self.reader.is_current(self.last_seq):
+                return True, frame
+            # The publisher lapped the ring while we copied; take the newest frame instead
+
+    def frame_is_current(self):
+        """False once the publisher has reused the slot of the last frame read()."""
+        return self.copy or self.reader.is_current(self.last_seq)
+
+    def release(self):
+        self.reader.close()
+
+
+def open_frame_source(use_bus, camera_index=DEFAULT_CAMERA, copy=False):
+    """Returns a VideoCapture-like source: the shared frame bus or the camera itself."""
+    if use_bus:
+        print(f"Attaching to frame bus '{BUS_NAME}'...")
+        return BusCapture(copy=copy)
+
+    import cv2
+    return cv2.VideoCapture(camera_index)
+
+
+def frame_is_current(cap):
+    """True unless cap is a bus source whose last frame was overwritten while in use."""
+    return not isinstance(cap, BusCapture) or cap.frame_is_current()
+
+
+# --- HEADLESS RESULT PUBLISHING ---
+def publish_results(payload, path=RESULTS_FILE):
+    """Atomically replaces the results file so readers never see a partial write."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(temp_path, path)
+
+
+# --- BUS OWNER PROCESS ---
+def run_publisher(camera_index=DEFAULT_CAMERA, fps=DEFAULT_FPS, slots=BUS_SLOTS, nice=VISION_NICE):
+    import cv2
+
+    cap = cv2.VideoCapture(camera_index)
+    lower_priority(nice)
+    ret, frame = cap.read()
+    if not ret:
+        print(f"❌ Could not read from camera {camera_index}.")
+        cap.release()
+        sys.exit(1)
+
+    bus = FrameBus(frame.shape, slots=slots, target_fps=fps)
+    print(f"📷 Frame bus '{BUS_NAME}' publishing {frame.shape[1]}x{frame.shape[0]} frames. Ctrl+C to stop.")
+    controls = ControlFollower()
+
+    try:
+        while ret:
+            started = time.monotonic()
+            bus.publish(frame)
+            controls.apply(bus.controls)
+
+            target_fps = bus.target_fps
+            if target_fps <= 0:
+                # Paused: keep the camera drained but publish nothing new
+                while bus.target_fps <= 0:
+                    if bus.pause_expired():
+                        print(f"⏯️ Pause not renewed for {BUS_MAX_PAUSE:.0f}s (controller gone?); resuming at {fps:g} fps.")
+                        bus.target_fps = fps
+                        break
+                    cap.grab()
+                    time.sleep(0.05)
+            else:
+                remaining = (1.0 / target_fps) - (time.monotonic() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+            ret, frame = cap.read()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        bus.close()
+        print("Frame bus closed.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish camera frames to a shared-memory ring buffer.")
+    parser.add_argument("--camera", type=int, default=DEFAULT_CAMERA)
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS)
+    parser.add_argument("--slots", type=int, default=BUS_SLOTS)
+    parser.add_argument("--nice", type=int, default=VISION_NICE, help="niceness for the publisher (0 = leave as is)")
+    args = parser.parse_args()
+
+    run_publisher(args.camera, args.fps, args.slots, args.nice)
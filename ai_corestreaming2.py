@@ -4,10 +4,19 @@ import datetime
 import json
 import time 
 from tavily import TavilyClient
+import tracing
+from governor import GOVERNOR
+from segmenter import SentenceSegmenter
+from local_intents import LOCAL_INTENTS
 
 # Update imports to use the new file names and paths
-from utils2 import MODEL_NAME, SYSTEM_PROMPT 
-from database2 import get_user_reminders, add_reminder, mark_reminder_completed, get_user_name_by_id
+from utils2 import (
+    MODEL_NAME, SYSTEM_PROMPT, INTENT_SLOT_MAX_CHARS, INTENT_MAX_TOKENS, SEARCH_MAX_RESULTS,
+    COMPLETE_AMBIGUITY_RATIO, INTENT_TIER,
+)
+from model_cascade import CASCADE, FAST, LARGE, passes_quality_gate
+from context_compressor import compress_results
+from database2 import get_user_reminders, add_reminder, mark_reminder_completed, search_reminders
 
 # --- GLOBAL INITIALIZATION ---
 print("Loading Tavily client...")
@@ -18,11 +27,19 @@ except Exception as e:
     print(f"❌ Failed to load Tavily client: {e}")
     TAVILY_CLIENT = None
 
-# --- OLLAMA STREAMING COMMUNICATION (Unchanged) ---
-def send_to_ollama(prompt: str, speak_func, chat_history: list):
+# --- OLLAMA STREAMING COMMUNICATION ---
+def send_to_ollama(prompt: str, speak_func, chat_history: list, model: str = MODEL_NAME,
+                   options: dict = None, timeout: float = 60, gate=None, on_first_token=None):
     """
     Sends a chat prompt to Ollama with streaming enabled, using chat_history
     to maintain context. Returns the full assistant response text.
+
+    With a `gate`, the first speakable chunk is passed to gate(chunk) before
+    anything is spoken; if it returns False (or the request fails before
+    then) the stream is abandoned and None is returned so the caller can
+    retry on another model. on_first_token() is called when the first token
+    arrives; the turn's first_token mark waits for the gate, so a rejected
+    reply that was never spoken doesn't set it.
     """
     
     # 1. Build the messages list using history
@@ -32,9 +49,9 @@ def send_to_ollama(prompt: str, speak_func, chat_history: list):
     messages.extend(chat_history) 
     messages.append({"role": "user", "content": prompt}) 
     
-    print(f"🤖 Sending to Ollama (Streaming): {prompt}")
+    print(f"🤖 Sending to Ollama (Streaming, {model}): {prompt}")
     
-    full_assistant_response = ""
+    response_chunks = []
     
     # Robust URL handling
     OLLAMA_URL = os.environ.get("OLLAMA_API_URL", "").strip()
@@ -47,17 +64,19 @@ def send_to_ollama(prompt: str, speak_func, chat_history: list):
         response = requests.post(
             OLLAMA_URL.rstrip('/') + "/api/chat",
             json={
-                "model": MODEL_NAME, 
+                "model": model, 
                 "messages": messages, 
-                "stream": True 
+                "stream": True,
+                "options": options or {},
             },
             stream=True, 
-            timeout=60
+            timeout=timeout
         )
         
         response.raise_for_status() 
 
-        buffer = ""
+        segmenter = SentenceSegmenter()
+        first_token_at = None
         print("🧠 Ollama response starting...")
         
         # --- Streaming and Buffering Logic ---
@@ -68,22 +87,23 @@ def send_to_ollama(prompt: str, speak_func, chat_history: list):
                     
                     if 'message' in chunk_data and 'content' in chunk_data['message']:
                         content = chunk_data['message']['content']
-                        buffer += content
-                        
-                        # --- Buffering Logic for Smooth TTS ---
-                        if content.endswith(('.', '!', '?')) and len(buffer.split()) > 2:
-                            speak_func(buffer)
-                            full_assistant_response += buffer
-                            buffer = ""
+                        if content and first_token_at is None:
+                            first_token_at = time.monotonic()
+                            if not gate:
+                                tracing.mark_once("first_token", first_token_at)
+                            if on_first_token:
+                                on_first_token()
                         
-                        elif len(buffer) > 100 and ' ' in buffer:
-                            break_index = max(buffer.rfind('.'), buffer.rfind('!'), buffer.rfind('?'))
-                            
-                            if break_index > 0 and break_index < len(buffer) - 10:
-                                chunk_to_speak = buffer[:break_index + 1]
-                                buffer = buffer[break_index + 1:].lstrip()
-                                speak_func(chunk_to_speak)
-                                full_assistant_response += chunk_to_speak
+                        # --- Sentence Segmentation for Smooth TTS ---
+                        for chunk_to_speak in segmenter.feed(content):
+                            if gate and not response_chunks:
+                                if not gate(chunk_to_speak):
+                                    print(f"↩️ Rejected first chunk from {model}: {chunk_to_speak}")
+                                    response.close()
+                                    return None
+                                tracing.mark_once("first_token", first_token_at)
+                            speak_func(chunk_to_speak)
+                            response_chunks.append(chunk_to_speak)
 
                     if chunk_data.get('done'):
                         break
@@ -92,32 +112,80 @@ def send_to_ollama(prompt: str, speak_func, chat_history: list):
                     print(f"⚠️ JSON decode error on chunk: {e}, line: {line[:50]}...")
                     continue
 
+        tracing.mark("generation_done")
+
         # Speak any remaining content in the buffer
-        if buffer.strip():
-            speak_func(buffer.strip())
-            full_assistant_response += buffer.strip()
+        remainder = segmenter.flush()
+        if gate and not response_chunks:
+            if not gate(remainder or ""):
+                print(f"↩️ Rejected reply from {model}: {remainder}")
+                return None
+            tracing.mark_once("first_token", first_token_at)
+        if remainder:
+            speak_func(remainder)
+            response_chunks.append(remainder)
             
     except requests.exceptions.RequestException as e:
         print(f"❌ Could not connect to Ollama or request failed: {e}")
+        if gate and not response_chunks:
+            return None
         speak_func("Sorry, I couldn't connect to my brain. Is Ollama running?")
         
-    return full_assistant_response 
+    return " ".join(response_chunks) 
+
+
+def respond(prompt: str, transcript: str, speak_func, chat_history: list, has_context: bool = False):
+    """
+    Answers through the model cascade: the fast tier for simple turns (its
+    first chunk quality-gated, escalating to the large tier on failure),
+    the large tier for complex ones unless its recent latency is over budget.
+    """
+    with GOVERNOR.during("generating"):
+        return _respond(prompt, transcript, speak_func, chat_history, has_context)
+
 
+def _respond(prompt, transcript, speak_func, chat_history, has_context):
+    tier = CASCADE.choose(transcript, has_context)
+    tracing.mark("model_choice")
 
-# --- TAVILY SEARCH TOOL (Unchanged) ---
-def search_with_tavily(query: str):
-    """Executes a search query using the Tavily API."""
+    if tier == FAST:
+        settings = CASCADE.settings(FAST)
+        response = send_to_ollama(
+            prompt, speak_func, chat_history, settings["model"], settings["options"], settings["timeout"],
+            gate=passes_quality_gate, on_first_token=CASCADE.first_token_timer(FAST),
+        )
+        if response is not None:
+            CASCADE.answered(FAST)
+            return response
+        print("🪜 Escalating to the large model.")
+        tracing.mark("escalate")
+
+    settings = CASCADE.settings(LARGE)
+    response = send_to_ollama(
+        prompt, speak_func, chat_history, settings["model"], settings["options"], settings["timeout"],
+        on_first_token=CASCADE.first_token_timer(LARGE),
+    )
+    CASCADE.answered(LARGE, escalated=tier == FAST)
+    return response
+
+
+# --- TAVILY SEARCH TOOL ---
+def search_with_tavily(query: str, transcript: str = ""):
+    """
+    Executes a search query using the Tavily API and returns only the
+    sentences most relevant to the query/transcript (see context_compressor.py).
+    """
     if not TAVILY_CLIENT:
         return None
         
     print(f"🛠️ Searching Tavily for: {query}")
     try:
         response = TAVILY_CLIENT.search(query, search_depth="basic")
-        results = response.get("results", [])[:3]
+        results = response.get("results", [])[:SEARCH_MAX_RESULTS]
         
-        context = ""
-        for result in results:
-            context += f"URL: {result.get('url', 'N/A')}\nContent: {result.get('content', 'N/A')}\n\n"
+        context, stats = compress_results(results, query, transcript)
+        print(f"✂️ Search context: {stats['kept']}/{stats['sentences']} sentences, "
+              f"~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens")
             
         return context
         
@@ -125,143 +193,123 @@ def search_with_tavily(query: str):
         print(f"❌ Tavily search failed: {e}")
         return None
 
-# --- LLM ROUTER (Unchanged) ---
-def route_command(transcript: str):
-    """Uses Ollama to decide if the command needs a web search or regular chat."""
-    
-    ROUTER_PROMPT = f"""
-You are a highly analytical AI router. Your task is to analyze the user's question and determine the appropriate action.
-You MUST output a single JSON object.
-Question: "{transcript}"
-JSON Output Format:
-{{
-  "action": "CHAT" or "SEARCH",
-  "search_query": "The concise search query if action is SEARCH, otherwise empty string"
-}}
+# --- STRUCTURED INTENT EXTRACTION ---
+# One short generation replaces the old router and reminder prompts. Ollama
+# constrains the output to INTENT_SCHEMA, so there is no free-form text to
+# dig a JSON object out of.
+INTENTS = ("CHAT", "SEARCH", "ADD_REMINDER", "VIEW", "COMPLETE", "EXIT")
+INTENT_SLOTS = ("search_query", "description", "due_date", "reminder")
+
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": list(INTENTS)},
+        "search_query": {"type": "string", "maxLength": INTENT_SLOT_MAX_CHARS},
+        "description": {"type": "string", "maxLength": INTENT_SLOT_MAX_CHARS},
+        "due_date": {"type": "string", "maxLength": len("YYYY-MM-DD")},
+        "reminder": {"type": "string", "maxLength": INTENT_SLOT_MAX_CHARS},
+    },
+    "required": ["intent"],
+    "additionalProperties": False,
+}
+
+
+INTENT_PROMPT = """Classify the user's request for a voice assistant with a reminder list and web search.
+intent: CHAT (conversation or general knowledge), SEARCH (needs current information from the web),
+ADD_REMINDER, VIEW (list reminders), COMPLETE (a reminder is done), EXIT (user is finished).
+Slots (empty string when unused): search_query for SEARCH, description and due_date (YYYY-MM-DD) for ADD_REMINDER,
+reminder (the words describing which reminder) for COMPLETE.
+Today's date: {today}
+Request: "{transcript}"
 """
-    print("🧠 Routing command via Ollama...")
 
-    OLLAMA_URL = os.environ.get("OLLAMA_API_URL", "").strip()
-    if not OLLAMA_URL:
-        return {"action": "CHAT", "search_query": transcript}
 
-    try:
-        response = requests.post(
-            OLLAMA_URL.rstrip('/') + "/api/generate",
-            json={
-                "model": MODEL_NAME, 
-                "prompt": ROUTER_PROMPT,
-                "stream": False,
-                "options": {"temperature": 0.1},
-            },
-            timeout=10
-        )
-        if response.ok:
-            response_text = response.json()['response'].strip()
-            
-            start_index = response_text.find('{')
-            end_index = response_text.rfind('}')
-            if start_index != -1 and end_index != -1:
-                json_string = response_text[start_index : end_index + 1]
-                return json.loads(json_string)
-
-            return {"action": "CHAT", "search_query": transcript}
-        
-        else:
-            print(f"⚠️ Ollama router returned non-OK status: {response.status_code}")
-            return {"action": "CHAT", "search_query": transcript}
-
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Ollama connection error during routing: {e}")
-        return {"action": "CHAT", "search_query": transcript}
-    except json.JSONDecodeError:
-        print("❌ JSON decode error during routing.")
-        return {"action": "CHAT", "search_query": transcript}
-
-
-# --- LOCAL TOOL HANDLER (Unchanged) ---
-def check_local_tools(transcript: str, speak_func):
-    """
-    Checks if the transcript matches a local, non-LLM tool command.
-    """
-    transcript_lower = transcript.lower()
-
-    # Tool 1: Conversation Exit - Matches "Nothing else. Thank you." flow
-    if "stop listening" in transcript_lower or "thank you" in transcript_lower or "that's all" in transcript_lower or "nothing else" in transcript_lower:
-        speak_func("You got it. I'm going back to quiet listening now.")
-        return {"action": "EXIT_CONVERSATION"}
-
-    # Tool 2: Python datetime (Local Tool)
-    if "what time is it" in transcript_lower:
-        print("🧠 Decision: Local time query.")
-        now = datetime.datetime.now().strftime("%-I:%M %p") 
-        speak_func(f"Oh, sure thing! It's {now} right now.")
-        return {"action": "LOCAL_HANDLED", "response_spoken": True}
+def validate_intent(data):
+    """Checks a decoded reply against INTENT_SCHEMA and fills in missing slots. Returns None if invalid."""
+    if not isinstance(data, dict):
+        return None
 
-    return {"action": "CONTINUE"}
+    intent = data.get("intent")
+    if not isinstance(intent, str) or intent.upper() not in INTENTS:
+        return None
 
+    result = {"intent": intent.upper()}
+    for slot in INTENT_SLOTS:
+        value = data.get(slot)
+        if value is None:
+            value = ""
+        if not isinstance(value, str):
+            return None
+        result[slot] = value.strip()
+    return result
 
-# --- NEW REMINDER TOOL HANDLER ---
-def handle_reminders(transcript: str, speak_func, user_id: int):
-    """
-    Uses the LLM to process the transcript and execute a database action.
-    """
-    
-    # Get the user's name for a personalized prompt
-    USER_NAME = get_user_name_by_id(user_id) 
 
-    REMINDER_PROMPT = f"""
-You are an intelligent assistant connected to a reminder database tool. Your task is to analyze the user's request and output a single JSON object to manage their reminders.
-
-Current User: {USER_NAME} (ID: {user_id})
-Today's Date: {datetime.date.today()}
+def parse_due_date(value):
+    """The due_date slot as YYYY-MM-DD, or None if it is empty or not a real date."""
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
 
-The JSON Output Format MUST include the 'action' key:
-{{
-  "action": "ADD_REMINDER", "VIEW_REMINDERS", "COMPLETE_REMINDER", or "ANSWER"
-  "description": "The exact reminder text to be added (if action is ADD_REMINDER), otherwise null.",
-  "reminder_id": "The ID of the reminder to complete (if action is COMPLETE_REMINDER), otherwise null.",
-  "question": "A friendly conversational response or question if action is ANSWER, otherwise null."
-}}
 
-If the user is asking to add a reminder, set action to ADD_REMINDER.
-If the user is asking to view their reminders, set action to VIEW_REMINDERS.
-If the user is asking to complete or clear a reminder, set action to COMPLETE_REMINDER.
-If the user is just asking a general question about reminders (e.g., 'What are reminders?'), set action to ANSWER.
+def extract_intent(transcript: str):
+    """Uses a single schema-constrained Ollama call to get the intent and its slots."""
+    fallback = {"intent": "CHAT", **{slot: "" for slot in INTENT_SLOTS}}
 
-User Request: "{transcript}"
-"""
-    
     OLLAMA_URL = os.environ.get("OLLAMA_API_URL", "").strip()
     if not OLLAMA_URL:
-        return {"action": "ANSWER", "question": "Sorry, I can't access the database tool right now because my brain isn't connected."}
-    
+        return fallback
+
+    print("🧠 Extracting intent via Ollama...")
     try:
-        response = requests.post(
-            OLLAMA_URL.rstrip('/') + "/api/generate",
-            json={
-                "model": MODEL_NAME, 
-                "prompt": REMINDER_PROMPT,
-                "stream": False,
-                "options": {"temperature": 0.1},
-            },
-            timeout=10
-        )
-        if response.ok:
-            response_text = response.json()['response'].strip()
-            start_index = response_text.find('{')
-            end_index = response_text.rfind('}')
-            if start_index != -1 and end_index != -1:
-                json_string = response_text[start_index : end_index + 1]
-                return json.loads(json_string)
-
-            return {"action": "ANSWER", "question": "I had a hard time understanding what you wanted to do with the reminders."}
-            
-        return {"action": "ANSWER", "question": "My router failed to process the reminder request."}
+        with GOVERNOR.during("generating"):
+            response = requests.post(
+                OLLAMA_URL.rstrip('/') + "/api/generate",
+                json={
+                    "model": CASCADE.settings(INTENT_TIER)["model"],
+                    "prompt": INTENT_PROMPT.format(today=datetime.date.today(), transcript=transcript),
+                    "format": INTENT_SCHEMA,
+                    "stream": False,
+                    "options": {"temperature": 0, "num_predict": INTENT_MAX_TOKENS},
+                },
+                timeout=10
+            )
+        if not response.ok:
+            print(f"⚠️ Ollama intent extraction returned non-OK status: {response.status_code}")
+            return fallback
+
+        reply = response.json()
+        if reply.get("done_reason") == "length":
+            # Cut off at INTENT_MAX_TOKENS: the JSON is incomplete, so treat it as conversation
+            print("⚠️ Intent reply was truncated, falling back to CHAT.")
+            return fallback
+
+        intent = validate_intent(json.loads(reply['response']))
+        if intent is None:
+            print("⚠️ Intent reply did not match the schema, falling back to CHAT.")
+            return fallback
+
+        print(f"🛠️ Decision: {intent['intent']}")
+        return intent
 
-    except Exception as e:
-        print(f"❌ Error during reminder routing: {e}")
-        return {"action": "ANSWER", "question": "I can't talk to my reminder system right now. Maybe try again?"}
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Ollama connection error during intent extraction: {e}")
+        return fallback
+    except (json.JSONDecodeError, KeyError, TypeError):
+        print("❌ JSON decode error during intent extraction.")
+        return fallback
+
+
+# --- LOCAL TOOL HANDLER ---
+def check_local_tools(transcript: str, speak_func, user_id: int = None):
+    """
+    Checks if the transcript matches a local, non-LLM tool command
+    (see local_intents.py for the registered intents and their phrases).
+    """
+    result = LOCAL_INTENTS.handle(transcript, speak_func, user_id)
+    if result is None:
+        return {"action": "CONTINUE"}
+    return result
 
 
 # --- PRIMARY COMMAND PROCESSOR (Modified) ---
@@ -269,7 +317,8 @@ def process_command(transcript: str, speak_func, chat_history: list, user_id: in
     """Processes the command, using chat_history and user_id, and returns a state flag."""
     
     # 1. --- Check for Local Tools and Exit Commands ---
-    local_result = check_local_tools(transcript, speak_func)
+    local_result = check_local_tools(transcript, speak_func, user_id)
+    tracing.mark("local_tools")
     
     if local_result["action"] == "EXIT_CONVERSATION":
         chat_history.clear() 
@@ -278,63 +327,63 @@ def process_command(transcript: str, speak_func, chat_history: list, user_id: in
     if local_result["action"] == "LOCAL_HANDLED":
         return "CONTINUE_CONVERSATION"
 
-    # 2. --- NEW: Check for Reminder Tool ---
-    if "reminder" in transcript.lower() or "task" in transcript.lower() or "to do" in transcript.lower() or "list" in transcript.lower():
-        print("🛠️ Decision: Reminder Tool activated.")
-        tool_result = handle_reminders(transcript, speak_func, user_id)
-        
-        # --- Execute Reminder Action ---
-        if tool_result["action"] == "ADD_REMINDER":
-            description = tool_result.get("description")
-            if description:
-                add_reminder(user_id=user_id, description=description)
-                speak_func(f"Got it. I added ' {description} ' to your list.")
-            else:
-                speak_func("I need a description to add a reminder. What should I remind you about?")
-            return "CONTINUE_CONVERSATION"
+    # 2. --- Structured Intent + Slots (single LLM call) ---
+    intent = extract_intent(transcript)
+    tracing.mark("intent")
+    action = intent["intent"]
 
-        elif tool_result["action"] == "VIEW_REMINDERS":
-            reminders = get_user_reminders(user_id=user_id)
-            if reminders:
-                # Format reminders for voice output
-                reminder_list = [f"Task {i+1}, {desc}. Due {due if due else 'sometime'}" for i, (desc, due, r_id) in enumerate(reminders)]
-                
-                speak_func(f"Sure, you have {len(reminders)} pending tasks. They are: {', '.join(reminder_list)}")
-                speak_func("I've also displayed them on the screen.")
-                
-            else:
-                speak_func("Awesome! You don't have any pending reminders.")
-            return "CONTINUE_CONVERSATION"
+    if action == "EXIT":
+        speak_func("You got it. I'm going back to quiet listening now.")
+        chat_history.clear()
+        return "EXIT_CONVERSATION"
 
-        elif tool_result["action"] == "COMPLETE_REMINDER":
-            # For this prototype, we'll tell the user how to do it manually
-            speak_func("I can mark a reminder complete, but I need the task ID displayed on the screen. Please tell me the ID of the task you want to clear.")
-            # In a GUI system, the LLM would ask "Which reminder ID should I complete?"
-            return "CONTINUE_CONVERSATION"
+    # --- Execute Reminder Action ---
+    if action == "ADD_REMINDER":
+        description = intent["description"]
+        if description:
+            add_reminder(user_id=user_id, description=description, due_date=parse_due_date(intent["due_date"]))
+            speak_func(f"Got it. I added ' {description} ' to your list.")
+        else:
+            speak_func("I need a description to add a reminder. What should I remind you about?")
+        return "CONTINUE_CONVERSATION"
+
+    if action == "VIEW":
+        reminders = get_user_reminders(user_id=user_id)
+        if reminders:
+            # Format reminders for voice output
+            reminder_list = [f"Task {i+1}, {desc}. Due {due if due else 'sometime'}" for i, (desc, due, r_id) in enumerate(reminders)]
             
-        elif tool_result["action"] == "ANSWER":
-            # If the LLM didn't choose an action, it gives a conversational answer
-            speak_func(tool_result.get("question", "I'm not sure how to handle that reminder request."))
-            return "CONTINUE_CONVERSATION"
+            speak_func(f"Sure, you have {len(reminders)} pending tasks. They are: {', '.join(reminder_list)}")
+            speak_func("I've also displayed them on the screen.")
+            
+        else:
+            speak_func("Awesome! You don't have any pending reminders.")
+        return "CONTINUE_CONVERSATION"
 
+    if action == "COMPLETE":
+        # Resolve the spoken description to a reminder_id through the full-text index
+        matches = search_reminders(user_id, intent["reminder"] or transcript, limit=2)
+        tracing.mark("reminder_search")
+        if not matches:
+            speak_func("Hmm, I couldn't find a pending reminder that matches that.")
+        elif len(matches) > 1 and matches[1][3] >= matches[0][3] * COMPLETE_AMBIGUITY_RATIO:
+            # Scores are the share of the spoken words each reminder contains: the runner-up is nearly as good
+            speak_func(f"Did you mean ' {matches[0][0]} ' or ' {matches[1][0]} '?")
+        else:
+            description, _, reminder_id, _ = matches[0]
+            mark_reminder_completed(reminder_id)
+            speak_func(f"Nice! I marked ' {description} ' as done.")
+        return "CONTINUE_CONVERSATION"
 
-    # 3. --- LLM Router (Only for non-reminder, non-local questions) ---
-    router_result = route_command(transcript)
-    
-    if router_result is None or not isinstance(router_result, dict):
-        router_result = {"action": "CHAT", "search_query": transcript}
-        
-    action = router_result.get("action", "CHAT").upper()
-    search_query = router_result.get("search_query", transcript) 
-    
-    # 4. --- EXECUTION Logic (Unchanged) ---
+    # 3. --- EXECUTION Logic ---
     assistant_response = "" 
 
     if action == "SEARCH":
-        # ... (Search logic remains the same) ...
+        search_query = intent["search_query"] or transcript
         print(f"🛠️ Executing Search for: {search_query}")
         
-        context = search_with_tavily(search_query) 
+        context = search_with_tavily(search_query, transcript) 
+        tracing.mark("search")
         
         if not context:
             speak_func("Sorry, I had a problem searching the web.")
@@ -350,14 +399,14 @@ Provide a concise answer based *only* on the context provided. Do not invent inf
 
 User's Question: {transcript}
 """
-        assistant_response = send_to_ollama(augmented_prompt, speak_func, chat_history) 
+        assistant_response = respond(augmented_prompt, transcript, speak_func, chat_history, has_context=True) 
 
     # --- Default: Regular Chat ---
     else:
         print("🧠 Execution: Regular chat/memory response.")
-        assistant_response = send_to_ollama(transcript, speak_func, chat_history) 
+        assistant_response = respond(transcript, transcript, speak_func, chat_history) 
     
-    # 5. LOG THE CONVERSATION HISTORY (Memory logging)
+    # 4. LOG THE CONVERSATION HISTORY (Memory logging)
     if assistant_response:
         chat_history.append({"role": "user", "content": transcript})
         chat_history.append({"role": "assistant", "content": assistant_response})
@@ -0,0 +1,104 @@
+import sys
+import asyncio
+import argparse
+import pyaudio
+
+from session_protocol import HELLO, AUDIO, TEXT, BYE, WELCOME, EVENT, PCM, END, encode, read_message, decode_json
+from audio_output import AudioOutput
+from utils2 import SERVER_HOST, SERVER_PORT, CHUNK_DURATION
+
+# --- LIGHTWEIGHT ASSISTANT CLIENT ---
+# Streams the microphone to assistant_server.py and plays back whatever it
+# sends. No Whisper, no LLM, no wake word: all of that lives on the server.
+SAMPLE_RATE = 16000
+CHUNK_SIZE = int(SAMPLE_RATE * CHUNK_DURATION)
+
+
+async def stream_microphone(writer, output, stop):
+    """Reads the mic in a thread and forwards every chunk (muted while we are talking)."""
+    loop = asyncio.get_running_loop()
+    pa = pyaudio.PyAudio()
+    stream = pa.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                     frames_per_buffer=CHUNK_SIZE)
+    try:
+        while not stop.is_set():
+            data = await loop.run_in_executor(None, lambda: stream.read(CHUNK_SIZE, exception_on_overflow=False))
+            if output.queue_depth() == 0:
+                writer.write(encode(AUDIO, data))
+                await writer.drain()
+    finally:
+        stream.stop_stream()
+        stream.close()
+        pa.terminate()
+
+
+async def type_commands(writer, stop):
+    """--text mode: each line typed is sent as an already-transcribed command."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        writer.write(encode(TEXT, {"text": line.strip()}))
+        await writer.drain()
+    stop.set()
+
+
+async def run_client(host, port, user, text_mode):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode(HELLO, {"user": user}))
+
+    kind, payload = await read_message(reader)
+    welcome = decode_json(payload) if kind == WELCOME else {"error": "no welcome from server"}
+    if "error" in welcome:
+        print(f"❌ {welcome['error']}")
+        writer.close()
+        return
+
+    print(f"✅ Connected as {welcome['user']} (session {welcome['session']}).")
+    output = AudioOutput(sample_rate=welcome["sample_rate"])
+    stop = asyncio.Event()
+    sender = asyncio.create_task(type_commands(writer, stop) if text_mode else stream_microphone(writer, output, stop))
+
+    try:
+        while not stop.is_set():
+            kind, payload = await read_message(reader)
+            if kind is None:
+                print("🔌 Server closed the connection.")
+                break
+            if kind == PCM:
+                output.play(payload)
+            elif kind == EVENT:
+                event = decode_json(payload)
+                if "transcript" in event:
+                    print(f"👂 Transcript: {event['transcript']}")
+                elif "say" in event:
+                    print(f"🗣️ {event['say']}")
+                elif "busy" in event:
+                    print(f"⏳ {event['busy']}")
+            elif kind == END:
+                print(f"— turn finished: {decode_json(payload).get('result')}")
+    finally:
+        stop.set()
+        sender.cancel()
+        writer.write(encode(BYE))
+        writer.close()
+        output.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Talk to a running assistant_server.py.")
+    parser.add_argument("user", help="your name (must be in the database)")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--text", action="store_true", help="type commands instead of speaking them")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_client(args.host, args.port, args.user, args.text))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+import diagnostics
+from governor import GOVERNOR
+from session_protocol import (
+    HELLO, AUDIO, TEXT, BYE, WELCOME, EVENT, PCM, END,
+    encode, read_message, decode_json,
+)
+from endpointing import Endpointer
+from utils2 import (
+    TTS_SAMPLE_RATE, SERVER_HOST, SERVER_PORT, SERVER_WORKERS,
+    SERVER_MAX_SESSIONS, SERVER_MAX_PENDING, SERVER_MAX_QUEUE_WAIT, SERVER_ANNOUNCE_POLL,
+    SERVER_MAX_WRITE_BUFFER,
+)
+
+# One Whisper model for every client: loaded once when stt_tts2 is imported.
+# Decodes on it are serialized (stt_tts2.WHISPER_LOCK); with several workers
+# one session's LLM/TTS still overlaps another's transcription.
+from stt_tts2 import transcribe_audio, SAMPLE_RATE
+from ai_corestreaming2 import process_command
+from database2 import init_db, get_user_id_by_name, get_user_name_by_id
+from tts_backends import get_synthesizer
+from local_intents import take_announcements
+
+# --- MULTI-CLIENT ASSISTANT SERVER ---
+# Clients stream microphone audio over a local socket (see session_protocol.py).
+# The event loop does the cheap work (framing, endpointing); complete
+# utterances are queued per session and handed to a bounded worker pool in
+# round-robin order, one turn in flight per session, so a chatty client can't
+# starve the others. Each session has its own chat_history and user_id.
+
+
+class Session:
+    def __init__(self, session_id, user_id, user_name, writer, loop):
+        self.id = session_id
+        self.user_id = user_id
+        self.user_name = user_name
+        self.chat_history = []
+        self.endpointer = Endpointer(SAMPLE_RATE)
+        self.pending = deque()   # (kind, data, queued_at)
+        self.busy = False
+        self.closed = False
+        self.turns = 0
+        self.writer = writer
+        self.loop = loop
+
+    def send(self, kind, payload=b""):
+        """Thread-safe: worker threads hop onto the event loop to write."""
+        if self.closed:
+            return
+        self.loop.call_soon_threadsafe(self._write, encode(kind, payload))
+
+    def _write(self, data):
+        if self.closed:
+            return
+        self.writer.write(data)
+        # Workers synthesize faster than a stalled client reads; don't buffer its audio forever
+        if self.writer.transport.get_write_buffer_size() > SERVER_MAX_WRITE_BUFFER:
+            print(f"⚠️ [{self.id}] Client is not reading, disconnecting it.")
+            self.closed = True
+            self.writer.transport.abort()
+
+    def speak(self, text):
+        """speak_func for process_command: streams synthesized PCM back to the client."""
+        print(f"🗣️ [{self.id}] Speaking: {text}")
+        self.send(EVENT, {"say": text})
+        # The governor is process-wide, but phases are reference-counted: this
+        # only holds "speaking" while any session speaks, and a session that is
+        # transcribing at the same time still takes precedence
+        with GOVERNOR.during("speaking"):
+            try:
+                for chunk in get_synthesizer().stream(text):
+                    if self.closed:
+                        break
+                    tracing.mark_once("first_audio")
+                    self.send(PCM, chunk)
+            except Exception as e:
+                print(f"❌ [{self.id}] TTS failed: {e}")
+
+
+class AssistantServer:
+    def __init__(self, workers=SERVER_WORKERS, max_sessions=SERVER_MAX_SESSIONS,
+                 max_pending=SERVER_MAX_PENDING, max_queue_wait=SERVER_MAX_QUEUE_WAIT):
+        self.workers = workers
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending
+        self.max_queue_wait = max_queue_wait
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="turn")
+        self.sessions = {}
+        self.rotation = deque()
+        self.in_flight = 0
+        self.ids = itertools.count(1)
+        self.loop = None
+        self.stats = {"sessions": 0, "rejected_sessions": 0, "turns": 0, "dropped_utterances": 0}
+
+    # --- CONNECTIONS ---
+    async def handle_client(self, reader, writer):
+        kind, payload = await read_message(reader)
+        if kind != HELLO:
+            writer.close()
+            return
+
+        try:
+            user_name = decode_json(payload).get("user", "")
+            if not isinstance(user_name, str):
+                raise ValueError("user must be a string")
+        except ValueError as e:
+            await self._reject(writer, f"Malformed HELLO: {e}")
+            return
+
+        if len(self.sessions) >= self.max_sessions:
+            self.stats["rejected_sessions"] += 1
+            await self._reject(writer, "Server is full, try again later.")
+            return
+
+        user_id = get_user_id_by_name(user_name)
+        if user_id is None:
+            await self._reject(writer, f"Unknown user '{user_name}'.")
+            return
+
+        session = Session(f"s{next(self.ids)}", user_id, get_user_name_by_id(user_id), writer, self.loop)
+        self.sessions[session.id] = session
+        self.rotation.append(session.id)
+        self.stats["sessions"] += 1
+        writer.write(encode(WELCOME, {"session": session.id, "user": session.user_name, "sample_rate": TTS_SAMPLE_RATE}))
+        print(f"🔌 [{session.id}] {session.user_name} connected ({len(self.sessions)} active).")
+
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                if kind is None or kind == BYE:
+                    break
+
+                if kind == TEXT:
+                    try:
+                        text = decode_json(payload).get("text", "")
+                    except ValueError:
+                        text = None
+                    if not isinstance(text, str):
+                        session.send(EVENT, {"error": "Malformed TEXT message."})
+                        continue
+                    self.submit(session, "text", text)
+
+                elif kind == AUDIO:
+                    if session.busy:
+                        # Half duplex, like the local loop: ignore the mic while we answer
+                        session.endpointer.reset()
+                        continue
+                    if session.endpointer.feed(payload):
+                        audio = session.endpointer.audio.getvalue()
+                        session.endpointer.reset()
+                        self.submit(session, "audio", audio)
+
+                await writer.drain()
+        except ConnectionError:
+            pass  # the client vanished, or we cut it off for not reading
+        finally:
+            session.closed = True
+            self.sessions.pop(session.id, None)
+            self.rotation.remove(session.id)
+            writer.close()
+            print(f"🔌 [{session.id}] disconnected after {session.turns} turns.")
+
+    async def _reject(self, writer, reason):
+        writer.write(encode(WELCOME, {"error": reason}))
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # --- ADMISSION AND SCHEDULING (event loop thread only) ---
+    def submit(self, session, kind, data):
+        if len(session.pending) >= self.max_pending:
+            self.stats["dropped_utterances"] += 1
+            session.send(EVENT, {"busy": "Too many requests queued for this session."})
+            session.send(END, {"result": "DROPPED"})
+            return
+        session.pending.append((kind, data, time.monotonic()))
+        self._schedule()
+
+    def _schedule(self):
+        scanned = 0
+        while self.in_flight < self.workers and scanned < len(self.rotation):
+            session = self.sessions[self.rotation[0]]
+            self.rotation.rotate(-1)
+            scanned += 1
+            if session.busy or not session.pending:
+                continue
+
+            kind, data, queued_at = session.pending.popleft()
+            if time.monotonic() - queued_at > self.max_queue_wait:
+                self.stats["dropped_utterances"] += 1
+                session.send(EVENT, {"busy": "Sorry, I was too busy to get to that."})
+                session.send(END, {"result": "DROPPED"})
+                continue
+
+            session.busy = True
+            self.in_flight += 1
+            scanned = 0
+            future = self.loop.run_in_executor(self.pool, self._run_turn, session, kind, data, queued_at)
+            future.add_done_callback(lambda f, s=session: self._turn_done(s, f))
+
+    def _turn_done(self, session, future):
+        session.busy = False
+        self.in_flight -= 1
+        if future.exception():
+            print(f"❌ [{session.id}] Turn failed: {future.exception()}")
+            session.send(END, {"result": "ERROR"})
+        else:
+            session.turns += 1
+            self.stats["turns"] += 1
+        self._schedule()
+
+    def _deliver_announcements(self):
+        """Queues due timer announcements as turns of their session; closed sessions' are dropped."""
+        def ready(speak_func):
+            session = getattr(speak_func, "__self__", None)
+            return isinstance(session, Session) and (session.closed or not session.busy)
+
+        for speak_func, text in take_announcements(ready):
+            if not speak_func.__self__.closed:
+                self.submit(speak_func.__self__, "announce", text)
+        self.loop.call_later(SERVER_ANNOUNCE_POLL, self._deliver_announcements)
+
+    # --- WORKER THREADS ---
+    def _run_turn(self, session, kind, data, queued_at):
+        if kind == "announce":
+            session.speak(data)
+            return
+
+        # The trace starts when the utterance was queued, so queue wait is included
+        tracing.start_turn(label=session.id, start=queued_at)
+        tracing.mark("dequeued")
+
+        if kind == "audio":
+            transcript = transcribe_audio(io.BytesIO(data), SAMPLE_RATE)
+        else:
+            transcript = data
+        tracing.mark("transcript")
+
+        if not transcript:
+            tracing.end_turn(result="NO_SPEECH", session=session.id)
+            session.send(END, {"result": "NO_SPEECH"})
+            return
+
+        session.send(EVENT, {"transcript": transcript})
+        result = process_command(transcript, session.speak, session.chat_history, session.user_id)
+        tracing.end_turn(result=result, session=session.id)
+        session.send(END, {"result": result})
+
+    # --- STATUS ---
+    def status(self):
+        return {
+            **self.stats,
+            "active_sessions": len(self.sessions),
+            "in_flight": self.in_flight,
+            "queued": sum(len(s.pending) for s in self.sessions.values()),
+        }
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.loop = asyncio.get_running_loop()
+        self._deliver_announcements()
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"🛰️ Assistant server listening on {host}:{port} "
+              f"({self.workers} workers, max {self.max_sessions} sessions).")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the assistant to several lightweight clients.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS)
+    parser.add_argument("--max-pending", type=int, default=SERVER_MAX_PENDING)
+    parser.add_argument("--stub-llm", action="store_true", help="answer from the offline benchmark stub instead of Ollama")
+    args = parser.parse_args()
+
+    if args.stub_llm:
+        from benchmark import StubOllama
+        StubOllama().start()
+    elif not os.environ.get("OLLAMA_API_URL", "").strip():
+        print("❌ ERROR: OLLAMA_API_URL environment variable not set.")
+        print("Please run: export OLLAMA_API_URL='http://localhost:11434'")
+        sys.exit(1)
+
+    init_db()
+    server = AssistantServer(args.workers, args.max_sessions, args.max_pending)
+    diagnostics.install()
+    diagnostics.register_source("server", server.status)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Server stats: {server.status()}")
+        server.pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
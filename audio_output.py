@@ -0,0 +1,159 @@
+import io
+import os
+import queue
+import threading
+import pyaudio
+
+from utils2 import TTS_SAMPLE_RATE
+
+# --- AUDIO OUTPUT ENGINE ---
+# One persistent PyAudio output stream fed from a queue by a playback thread.
+# Callers enqueue PCM (a whole clip or an iterator of chunks from a streaming
+# synthesizer) and wait on events instead of polling; nothing touches disk.
+WRITE_FRAMES = 1024  # frames per stream.write(), also the granularity of stop()
+
+_mixer = None
+_mixer_lock = threading.Lock()
+
+
+def _mp3_decoder():
+    """
+    pygame's mixer, set up on first use: it is only an in-memory mp3 decoder
+    (for gTTS), so importers that never decode mp3 never load SDL. The dummy
+    driver keeps it from grabbing the sound card our PyAudio stream owns.
+    """
+    global _mixer
+    with _mixer_lock:
+        if _mixer is None:
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+            import pygame
+            pygame.mixer.init(frequency=TTS_SAMPLE_RATE, size=-16, channels=1)
+            _mixer = pygame.mixer
+        return _mixer
+
+
+def decode_mp3(data: bytes) -> bytes:
+    """Decodes mp3 bytes to 16-bit mono PCM at TTS_SAMPLE_RATE, entirely in memory."""
+    return _mp3_decoder().Sound(file=io.BytesIO(data)).get_raw()
+
+
+class PlaybackItem:
+    def __init__(self, pcm, on_done=None):
+        self.pcm = pcm
+        self.on_done = on_done
+        self.started = threading.Event()  # set when the first samples reach the stream
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class AudioOutput:
+    def __init__(self, sample_rate=TTS_SAMPLE_RATE, channels=1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_bytes = 2 * channels
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=sample_rate,
+            output=True,
+            frames_per_buffer=WRITE_FRAMES,
+        )
+        self.queue = queue.Queue()
+        self.playing = None
+        self._abort = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audio-output", daemon=True)
+        self._thread.start()
+
+    def play(self, pcm, on_done=None) -> PlaybackItem:
+        """
+        Queues PCM bytes, or an iterator of PCM chunks, for playback and returns
+        immediately; wait on item.done (or use on_done).
+        """
+        item = PlaybackItem(pcm, on_done)
+        self.queue.put(item)
+        return item
+
+    def queue_depth(self) -> int:
+        """Clips waiting to play, including the one currently playing."""
+        return self.queue.qsize() + (1 if self.playing is not None else 0)
+
+    def stop(self):
+        """Drops everything queued and cuts the current clip short."""
+        while True:
+            try:
+                self._finish(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if self.playing is not None:
+            self._abort.set()
+
+    def close(self):
+        self.stop()
+        self.queue.put(None)
+        self._thread.join(timeout=2)
+        self.stream.stop_stream()
+        self.stream.close()
+        self.pa.terminate()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            self.playing = item
+            self._abort.clear()
+            try:
+                chunks = [item.pcm] if isinstance(item.pcm, (bytes, bytearray)) else item.pcm
+                for chunk in chunks:
+                    if self._abort.is_set():
+                        break
+                    self._write(chunk, item)
+            except Exception as e:
+                # A streaming synthesizer failed mid-clip; don't take the engine down with it
+                item.error = e
+                print(f"❌ Playback failed: {e}")
+            self.playing = None
+
+            # stream.write() returns once the last block is buffered; signal
+            # completion when it has actually left the speaker.
+            latency = self.stream.get_output_latency()
+            if latency > 0 and not self._abort.is_set():
+                threading.Timer(latency, self._finish, args=(item,)).start()
+            else:
+                self._finish(item)
+
+    def _write(self, pcm, item):
+        block = WRITE_FRAMES * self.frame_bytes
+        view = memoryview(pcm)
+        for offset in range(0, len(view), block):
+            if self._abort.is_set():
+                return
+            item.started.set()
+            self.stream.write(bytes(view[offset:offset + block]))
+
+    def _finish(self, item):
+        item.started.set()
+        item.done.set()
+        if item.on_done:
+            try:
+                item.on_done()
+            except Exception as e:
+                print(f"⚠️ Playback completion callback failed: {e}")
+
+
+_output = None
+_output_lock = threading.Lock()
+
+
+def get_output() -> AudioOutput:
+    """Returns the shared output engine, opening the stream on first use."""
+    global _output
+    with _output_lock:
+        if _output is None:
+            _output = AudioOutput()
+        return _output
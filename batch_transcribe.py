@@ -0,0 +1,325 @@
+import os
+import re
+import csv
+import sys
+import json
+import time
+import wave
+import signal
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils2 import (
+    CHUNK_DURATION, SILENCE_THRESHOLD, WHISPER_MODEL_SIZE, WHISPER_LANGUAGE,
+    WHISPER_TEMPERATURE, WHISPER_BEAM_SIZE, MIN_SPEECH_DURATION,
+    NO_SPEECH_THRESHOLD, LOGPROB_THRESHOLD,
+)
+from endpointing import Endpointer, trim_silence
+
+# --- BULK OFFLINE TRANSCRIPTION + WER ---
+# Re-runs STT over a directory or manifest of recorded utterances, for tuning
+# SILENCE_THRESHOLD and the Whisper model size against reference transcripts.
+# Work is spread over worker processes that each load the model once; clips
+# that fit in Whisper's 30 s window are decoded in batches with one
+# whisper.decode() call. Results are appended to a JSON-lines file as they
+# finish, and files already transcribed in it are skipped, so an interrupted
+# run resumes (and retries the ones that failed). Clips are silence-trimmed,
+# decoded with the same pinned options and dropped as silence by the same
+# no-speech check as the live path (stt_tts2.transcribe_audio) unless
+# --no-trim is given.
+#
+#   python batch_transcribe.py recordings/ --model base --out stt_eval.jsonl
+#   python batch_transcribe.py manifest.jsonl --silence-threshold 300
+WHISPER_RATE = 16000
+WINDOW_SECONDS = 30.0
+
+
+# --- INPUTS ---
+def load_items(source):
+    """
+    Returns [{"audio": path, "text": reference or None}]. Accepts a directory
+    (references read from a sibling .txt with the same stem), a .jsonl
+    manifest ({"audio": ..., "text": ...}) or a .csv manifest (audio,text).
+    """
+    items = []
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(".wav"):
+                    path = os.path.join(root, name)
+                    reference_path = os.path.splitext(path)[0] + ".txt"
+                    reference = None
+                    if os.path.exists(reference_path):
+                        with open(reference_path) as f:
+                            reference = f.read().strip()
+                    items.append({"audio": path, "text": reference})
+        return items
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="") as f:
+        if source.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            path = row["audio"]
+            items.append({"audio": path if os.path.isabs(path) else os.path.join(base, path), "text": row.get("text")})
+    return items
+
+
+def read_audio(path):
+    """Reads a 16-bit WAV as int16 mono at 16 kHz (downmixed/resampled if needed)."""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError("only 16-bit WAV is supported")
+        channels, rate = wf.getnchannels(), wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != WHISPER_RATE:
+        positions = np.arange(0, len(samples), rate / WHISPER_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    return samples
+
+
+def endpoint(samples, threshold):
+    """Cuts the clip where the live Endpointer would have stopped recording."""
+    endpointer = Endpointer(WHISPER_RATE, threshold=threshold)
+    chunk = int(WHISPER_RATE * CHUNK_DURATION)
+    for offset in range(0, len(samples), chunk):
+        if endpointer.feed(samples[offset:offset + chunk].tobytes()):
+            return samples[:offset + chunk]
+    return samples
+
+
+# --- WER ---
+def normalize_text(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", (text or "").lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Levenshtein distance over words: (edits, reference word count)."""
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1], len(ref)
+
+
+# --- WORKER PROCESSES ---
+_model = None
+_options = None
+
+
+def _init_worker(model_size, threads):
+    """Runs once per worker process: pin its thread count and load the model."""
+    global _model, _options
+    import torch
+    import whisper
+
+    torch.set_num_threads(threads)
+    _model = whisper.load_model(model_size, device="cpu")
+    _options = whisper.DecodingOptions(
+        language=WHISPER_LANGUAGE, temperature=WHISPER_TEMPERATURE, beam_size=WHISPER_BEAM_SIZE,
+        fp16=False, without_timestamps=True,
+    )
+
+
+def _transcribe_batch(batch, silence_threshold, trim=True):
+    """Transcribes a list of items; clips under 30 s share a single batched decode."""
+    results = []
+    short, short_audio = [], []
+    for item in batch:
+        started = time.perf_counter()
+        try:
+            samples = read_audio(item["audio"])
+            if silence_threshold is not None:
+                samples = endpoint(samples, silence_threshold)
+            if trim:
+                samples = trim_silence(samples, WHISPER_RATE)
+            audio = samples.astype(np.float32) / 32768.0
+        except Exception as e:
+            results.append({**item, "error": str(e)})
+            continue
+
+        seconds = len(audio) / WHISPER_RATE
+        if trim and seconds < MIN_SPEECH_DURATION:
+            results.append({**item, "transcript": "", "audio_seconds": seconds,
+                            "decode_seconds": time.perf_counter() - started})
+        elif seconds <= WINDOW_SECONDS:
+            short.append((item, seconds, time.perf_counter() - started))
+            short_audio.append(audio)
+        else:
+            try:
+                text = _model.transcribe(
+                    audio, language=WHISPER_LANGUAGE, temperature=WHISPER_TEMPERATURE, beam_size=WHISPER_BEAM_SIZE,
+                    fp16=False, condition_on_previous_text=False,
+                )["text"].strip()
+            except Exception as e:
+                results.append({**item, "error": str(e)})
+                continue
+            results.append({**item, "transcript": text, "audio_seconds": seconds,
+                            "decode_seconds": time.perf_counter() - started})
+
+    if short:
+        started = time.perf_counter()
+        try:
+            decoded = _decode_windows(short_audio)
+        except Exception:
+            # One bad clip fails the whole batch; decode them one by one so only it is lost
+            decoded = None
+        if decoded is not None:
+            share = (time.perf_counter() - started) / len(short)
+            for (item, seconds, prep), result in zip(short, decoded):
+                results.append({**item, "transcript": _text(result), "audio_seconds": seconds,
+                                "decode_seconds": prep + share})
+        else:
+            for (item, seconds, prep), audio in zip(short, short_audio):
+                started = time.perf_counter()
+                try:
+                    result, = _decode_windows([audio])
+                except Exception as e:
+                    results.append({**item, "error": str(e)})
+                    continue
+                results.append({**item, "transcript": _text(result), "audio_seconds": seconds,
+                                "decode_seconds": prep + time.perf_counter() - started})
+    return results
+
+
+def _decode_windows(clips):
+    """One batched whisper.decode() over clips that each fit in a 30 s window."""
+    import torch
+    import whisper
+
+    mels = np.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(a), n_mels=_model.dims.n_mels).numpy() for a in clips])
+    return whisper.decode(_model, torch.from_numpy(mels), _options)
+
+
+def _text(result):
+    """The transcript, or "" where the live path would have decided there was no speech."""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return ""
+    return result.text.strip()
+
+
+def make_batches(items, batch_size, batch_seconds):
+    """Groups clips by count and total duration so short utterances travel together."""
+    batches, current, current_seconds = [], [], 0.0
+    for item in items:
+        try:
+            with wave.open(item["audio"], "rb") as wf:
+                seconds = wf.getnframes() / wf.getframerate()
+        except Exception:
+            seconds = WINDOW_SECONDS
+        if current and (len(current) >= batch_size or current_seconds + seconds > batch_seconds):
+            batches.append(current)
+            current, current_seconds = [], 0.0
+        current.append(item)
+        current_seconds += seconds
+    if current:
+        batches.append(current)
+    return batches
+
+
+# --- DRIVER ---
+def load_done(output_path):
+    done = set()
+    if os.path.exists(output_path):
+        with open(output_path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interruption
+                if "transcript" in row:
+                    done.add(row["audio"])  # failed files are tried again
+    return done
+
+
+def summarize(output_path):
+    edits = words = files = errors = 0
+    audio_seconds = decode_seconds = 0.0
+    latest = {}
+    with open(output_path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            latest[row["audio"]] = row  # a retried file's last attempt counts
+    for row in latest.values():
+        if "error" in row:
+            errors += 1
+            continue
+        files += 1
+        audio_seconds += row["audio_seconds"]
+        decode_seconds += row["decode_seconds"]
+        if row.get("text") is not None:
+            edits += row["word_errors"]
+            words += row["reference_words"]
+
+    print(f"\n📝 {files} files ({audio_seconds / 60:.1f} min of audio), {errors} failed (rerun to retry them).")
+    if audio_seconds:
+        print(f"   Decode time {decode_seconds:.1f}s of worker time, RTF {decode_seconds / audio_seconds:.3f}")
+    if words:
+        print(f"   Corpus WER {edits / words:.2%} ({edits} errors / {words} reference words)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-transcribe recorded utterances and score them against references.")
+    parser.add_argument("source", help="directory of WAVs or a .jsonl/.csv manifest")
+    parser.add_argument("--out", default="stt_eval.jsonl")
+    parser.add_argument("--model", default=WHISPER_MODEL_SIZE, help="Whisper model size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=8, help="max clips per batched decode")
+    parser.add_argument("--batch-seconds", type=float, default=120.0, help="max audio per batch")
+    parser.add_argument("--silence-threshold", type=int, nargs="?", const=SILENCE_THRESHOLD,
+                        help="cut each clip where live endpointing with this threshold would stop")
+    parser.add_argument("--no-trim", action="store_true", help="send whole clips to Whisper (no silence trimming)")
+    args = parser.parse_args()
+
+    # utils2 turns Ctrl+C into sys.exit(0); here it should stop the pool and report how to resume
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    items = load_items(args.source)
+    done = load_done(args.out)
+    todo = [item for item in items if item["audio"] not in done]
+    print(f"🗂️ {len(items)} utterances, {len(items) - len(todo)} already done, {len(todo)} to transcribe.")
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    batches = make_batches(todo, args.batch_size, args.batch_seconds)
+    started = time.monotonic()
+    finished = 0
+
+    with open(args.out, "a") as out, ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.model, threads)
+    ) as pool:
+        futures = [pool.submit(_transcribe_batch, batch, args.silence_threshold, not args.no_trim) for batch in batches]
+        try:
+            for future in as_completed(futures):
+                for row in future.result():
+                    if row.get("text") is not None and "transcript" in row:
+                        row["word_errors"], row["reference_words"] = word_errors(row["text"], row["transcript"])
+                        row["wer"] = row["word_errors"] / row["reference_words"] if row["reference_words"] else 0.0
+                    out.write(json.dumps(row) + "\n")
+                    finished += 1
+                out.flush()
+                print(f"  {finished}/{len(todo)} done ({finished / (time.monotonic() - started):.1f} files/s)", end="\r")
+        except KeyboardInterrupt:
+            print("\n⏸️ Interrupted; rerun the same command to resume.")
+            for future in futures:
+                future.cancel()
+            return 1
+
+    summarize(args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,680 @@
+# --- OFFLINE END-TO-END LATENCY BENCHMARK ---
+# Replays WAV fixtures through a fake PyAudio into record_command, serves the
+# LLM from a local stub Ollama server, swallows TTS in a null sink and drives
+# process_command through scripted multi-turn scenarios. No microphone,
+# network or real model is needed.
+#
+#   python benchmark.py                    # run bench_scenarios.json against the baseline
+#   python benchmark.py --save-baseline    # store results as the new baseline
+#   python benchmark.py --speed 0 --stt    # replay audio instantly, run Whisper on it
+#   python benchmark.py --tts-bench espeak,piper,gtts   # time-to-first-sample and RTF per TTS backend
+#   python benchmark.py --reminder-bench 100000         # full-text reminder lookup vs table scans
+import os
+import re
+import sys
+import json
+import math
+import time
+import wave
+import random
+import struct
+import argparse
+import tempfile
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The harness must never touch the real trace file, diagnostics socket, Tavily or Ollama
+os.environ.setdefault("ALEX_TRACE_FILE", "")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-offline-benchmark")
+os.environ.setdefault("ALEX_DIAG_SOCKET", "")
+
+import tracing
+
+SCENARIO_FILE = "bench_scenarios.json"
+BASELINE_FILE = "bench_baseline.json"
+FIXTURE_DIR = "bench_fixtures"
+REGRESSION_METRICS = ("time_to_transcript", "time_to_first_token", "time_to_first_audio", "turn_total")
+DEFAULT_REPLY = "Sure thing! It's a pretty simple one. Let me know if you need anything else."
+
+
+# --- FAKE MICROPHONE ---
+class FakeStream:
+    """PyAudio input stream replaying queued PCM, then silence, at `speed` x real time."""
+
+    def __init__(self, owner, rate, frames_per_buffer):
+        self.owner = owner
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.active = True
+        self.next_due = time.monotonic()
+
+    def read(self, num_frames, exception_on_overflow=True):
+        if self.owner.speed > 0:
+            # Pace reads like a real sound card would
+            self.next_due += num_frames / self.rate / self.owner.speed
+            delay = self.next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        wanted = num_frames * 2
+        data = self.owner.take(wanted)
+        self.owner.frames_read += num_frames
+        return data + b"\x00" * (wanted - len(data))
+
+    def get_read_available(self):
+        return self.frames_per_buffer
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+
+class FakeOutputStream:
+    """PyAudio output stream that discards what is written, paced like a sound card at `speed` x real time."""
+
+    def __init__(self, owner, rate, channels=1):
+        self.owner = owner
+        self.rate = rate
+        self.frame_bytes = 2 * channels
+        self.next_due = time.monotonic()
+
+    def write(self, data):
+        frames = len(data) // self.frame_bytes
+        if self.owner.speed > 0:
+            self.next_due = max(self.next_due, time.monotonic()) + frames / self.rate / self.owner.speed
+            delay = self.next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.owner.frames_written += frames
+
+    def get_output_latency(self):
+        return 0.0
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePyAudio:
+    """
+    Stands in for pyaudio.PyAudio(). Utterances queued with queue_wav() are
+    played into whichever input stream reads next; once they run out the
+    stream returns silence, which is what ends record_command's endpointing.
+    Output streams (audio_output's) take the PCM and drop it.
+    """
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.pending = bytearray()
+        self.lock = threading.Lock()
+        self.frames_read = 0
+        self.frames_written = 0
+        self.streams_opened = 0
+
+    def queue_pcm(self, pcm):
+        with self.lock:
+            self.pending.extend(pcm)
+
+    def queue_wav(self, path):
+        self.queue_pcm(read_wav_pcm(path))
+
+    def take(self, num_bytes):
+        with self.lock:
+            data = bytes(self.pending[:num_bytes])
+            del self.pending[:num_bytes]
+        return data
+
+    def open(self, rate, channels=1, format=None, input=False, output=False,
+             frames_per_buffer=1024, input_device_index=None, **kwargs):
+        self.streams_opened += 1
+        if output:
+            return FakeOutputStream(self, rate, channels)
+        return FakeStream(self, rate, frames_per_buffer)
+
+    def get_sample_size(self, format):
+        return 2
+
+    def terminate(self):
+        pass
+
+
+def read_wav_pcm(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: fixtures must be 16-bit mono WAV")
+        return wf.readframes(wf.getnframes())
+
+
+def make_fixture(path, speech_seconds=1.5, lead_silence=0.5, sample_rate=16000, seed=0):
+    """Writes a speech-like fixture: silence, then amplitude-modulated noise bursts."""
+    rng = random.Random(seed)
+    samples = [0] * int(lead_silence * sample_rate)
+    for i in range(int(speech_seconds * sample_rate)):
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * i / sample_rate)  # ~4 syllables/s
+        samples.append(int(rng.gauss(0, 3000) * envelope))
+    samples = [max(-32768, min(32767, s)) for s in samples]
+
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+# --- STUB OLLAMA ---
+class StubOllama:
+    """
+    Local HTTP server speaking the two Ollama endpoints we use.
+    /api/chat streams `reply` one word at a time after `first_token_delay`
+    at `token_rate` tokens/s; /api/generate returns `generate_reply` in one piece.
+    """
+
+    def __init__(self, first_token_delay=0.3, token_rate=25.0, reply=DEFAULT_REPLY):
+        self.first_token_delay = first_token_delay
+        self.token_rate = token_rate
+        self.reply = reply
+        self.generate_reply = None
+        self.requests = 0
+        self.tokens_served = 0
+        self.server = None
+
+    def tokens(self, text):
+        return re.findall(r"\S+\s*", text)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests += 1
+
+                if self.path == "/api/chat":
+                    self._chat(body)
+                elif self.path == "/api/generate":
+                    self._generate(body)
+                else:
+                    self.send_error(404)
+
+            def _chat(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+
+                time.sleep(stub.first_token_delay)
+                for token in stub.tokens(stub.reply):
+                    chunk = {"model": body.get("model"), "message": {"role": "assistant", "content": token}, "done": False}
+                    self.wfile.write((json.dumps(chunk) + "\n").encode())
+                    self.wfile.flush()
+                    stub.tokens_served += 1
+                    time.sleep(1.0 / stub.token_rate)
+                self.wfile.write((json.dumps({"model": body.get("model"), "done": True}) + "\n").encode())
+
+            def _generate(self, body):
+                reply = stub.generate_reply
+                if reply is None:
+                    reply = {"intent": "CHAT"}
+                text = reply if isinstance(reply, str) else json.dumps(reply)
+
+                token_count = len(stub.tokens(text))
+                time.sleep(stub.first_token_delay + token_count / stub.token_rate)
+                stub.tokens_served += token_count
+
+                payload = json.dumps({"model": body.get("model"), "response": text, "done": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        os.environ["OLLAMA_API_URL"] = url
+        return url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class StubTavily:
+    """Offline replacement for TavilyClient.search()."""
+
+    def search(self, query, search_depth="basic"):
+        content = f"{query} is covered in this offline benchmark result. " * 20
+        return {"results": [{"url": f"https://example.com/{i}", "content": content} for i in range(5)]}
+
+
+# --- NULL TTS ---
+class NullSpeaker:
+    """
+    speak() replacement that records what would have been said. With a
+    words_per_second rate it also sleeps for the simulated playback time.
+    """
+
+    def __init__(self, words_per_second=0.0):
+        self.words_per_second = words_per_second
+        self.spoken = []
+
+    def __call__(self, text):
+        tracing.mark_once("first_audio")
+        self.spoken.append(text)
+        if self.words_per_second > 0:
+            time.sleep(len(text.split()) / self.words_per_second)
+
+
+class SynthSink:
+    """Offline TTS sink: runs a real synthesizer backend but discards the audio."""
+
+    def __init__(self, synthesizer):
+        self.synthesizer = synthesizer
+        self.spoken = []
+
+    def __call__(self, text):
+        for _ in self.synthesizer.stream(text):
+            tracing.mark_once("first_audio")
+        self.spoken.append(text)
+
+
+TTS_SENTENCES = [
+    "Sure thing!",
+    "Oh yeah, the capital of France is Paris.",
+    "It's a pretty simple one, you just mix the flour and the eggs, then let it rest for about ten minutes.",
+    "Got it. I added buy new batteries for the servo motors to your list, let me know if you need anything else.",
+]
+
+
+def bench_tts(names, repeat):
+    """Time-to-first-sample and real-time factor (synthesis time / audio duration) per backend."""
+    from tts_backends import create_synthesizer
+    from utils2 import TTS_SAMPLE_RATE
+
+    print(f"  {'backend':<10}{'first sample p50':>18}{'first sample max':>18}{'RTF p50':>10}")
+    for name in names:
+        try:
+            synthesizer = create_synthesizer(name)
+        except Exception as e:
+            print(f"  {name:<10} unavailable: {e}")
+            continue
+
+        first_samples, factors = [], []
+        for _ in range(repeat):
+            for sentence in TTS_SENTENCES:
+                start = time.perf_counter()
+                first = None
+                total_bytes = 0
+                for chunk in synthesizer.stream(sentence):
+                    if first is None:
+                        first = time.perf_counter() - start
+                    total_bytes += len(chunk)
+                elapsed = time.perf_counter() - start
+                audio_seconds = total_bytes / 2 / TTS_SAMPLE_RATE
+                if first is None or not audio_seconds:
+                    continue
+                first_samples.append(first)
+                factors.append(elapsed / audio_seconds)
+
+        if not first_samples:
+            print(f"  {name:<10} produced no audio")
+            continue
+        print(f"  {name:<10}{statistics.median(first_samples):>17.3f}s{max(first_samples):>17.3f}s{statistics.median(factors):>10.3f}")
+
+
+# --- REMINDER SEARCH BENCHMARK ---
+REMINDER_VERBS = ["buy", "call", "email", "fix", "pick up", "book", "pay", "clean", "check", "return"]
+REMINDER_OBJECTS = [
+    "batteries", "servo motors", "groceries", "the dentist", "professor", "car insurance", "library books",
+    "garage door", "ESP32 board", "plane tickets", "electric bill", "birthday cake", "printer ink",
+    "soldering iron", "gym membership", "water filter", "bike tyres", "passport photos", "router", "laptop charger",
+]
+REMINDER_EXTRAS = ["", "before friday", "for the capstone demo", "tomorrow morning", "on the way home", "again"]
+
+
+def bench_reminders(count, users=100, queries=200, seed=7):
+    """
+    Lookup latency of the FTS5 path over `count` reminders across `users`,
+    against a full table scan and the user_id-indexed scan, plus what
+    search_reminders picks at this list size (database2.FTS_MIN_REMINDERS).
+    """
+    import sqlite3
+    import database2
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        database2.DB_NAME = os.path.join(tmp, "reminders.db")
+        database2.init_db()
+
+        rows = [
+            (rng.randint(1, users), " ".join(filter(None, [rng.choice(REMINDER_VERBS), rng.choice(REMINDER_OBJECTS), rng.choice(REMINDER_EXTRAS)])))
+            for _ in range(count)
+        ]
+        conn = sqlite3.connect(database2.DB_NAME)
+        start = time.perf_counter()
+        conn.executemany("INSERT INTO reminders (user_id, description) VALUES (?, ?)", rows)
+        conn.commit()
+        insert_seconds = time.perf_counter() - start
+
+        fts, full_scan, user_scan, chosen, hits = [], [], [], [], 0
+        for _ in range(queries):
+            reminder_id = rng.randint(1, count)
+            user_id, description = rows[reminder_id - 1]
+            spoken = f"I've done the {description}"
+            terms = database2._search_terms(spoken)
+
+            start = time.perf_counter()
+            database2._fts_search(conn.cursor(), user_id, terms, 3)
+            fts.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            matches = database2.search_reminders(user_id, spoken, limit=3)
+            chosen.append(time.perf_counter() - start)
+            hits += any(m[0] == description for m in matches)
+
+            start = time.perf_counter()
+            cursor = conn.execute(
+                "SELECT description, due_date, reminder_id FROM reminders NOT INDEXED WHERE user_id = ? AND is_completed = 0",
+                (user_id,),
+            )
+            database2._rank_by_overlap(cursor.fetchall(), terms, 3)
+            full_scan.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            database2._scan_reminders(conn.cursor(), user_id, terms, 3)
+            user_scan.append(time.perf_counter() - start)
+        conn.close()
+
+    def ms(samples, point):
+        ordered = sorted(samples)
+        return 1000 * ordered[min(len(ordered) - 1, round(point / 100 * (len(ordered) - 1)))]
+
+    print(f"  {count} reminders across {users} users (~{count // users} each), inserted in {insert_seconds:.2f}s "
+          f"({count / insert_seconds:,.0f}/s including index triggers)")
+    print(f"  {'lookup':<22}{'p50':>10}{'p95':>10}")
+    for name, samples in (("FTS5", fts), ("full table scan", full_scan), ("user_id index scan", user_scan),
+                          ("search_reminders", chosen)):
+        print(f"  {name:<22}{ms(samples, 50):>8.2f}ms{ms(samples, 95):>8.2f}ms")
+    path = "FTS5" if count // users >= database2.FTS_MIN_REMINDERS else "user_id index scan"
+    print(f"  search_reminders uses: {path} (FTS5 from {database2.FTS_MIN_REMINDERS} reminders per user)")
+    print(f"  Target reminder in the top 3: {hits}/{queries}")
+
+    # State the outcome plainly: the FTS index only wins once per-user lists are long
+    for name, samples in (("full table scan", full_scan), ("user_id index scan", user_scan)):
+        ratio = ms(samples, 50) / ms(fts, 50)
+        verdict = "faster" if ratio > 1.1 else "slower" if ratio < 0.9 else "about even"
+        print(f"  FTS5 vs {name}: {verdict} ({ratio:.1f}x at p50)")
+
+
+# --- SCENARIO RUNNER ---
+def setup_database(path):
+    import database2
+
+    database2.DB_NAME = path
+    database2.init_db()
+    database2.add_user(1, "Bench")
+    return 1
+
+
+def run_scenarios(scenarios, args):
+    stub = StubOllama(args.first_token_delay, args.token_rate)
+    stub.start()
+
+    import ai_corestreaming2
+    ai_corestreaming2.TAVILY_CLIENT = StubTavily()
+
+    needs_audio = any(turn.get("wav") for scenario in scenarios for turn in scenario["turns"])
+    stt = None
+    if needs_audio:
+        import stt_tts2
+        stt = stt_tts2
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+
+    fake_pa = FakePyAudio(speed=args.speed)
+    if args.tts_sink:
+        from tts_backends import create_synthesizer
+        speaker = SynthSink(create_synthesizer(args.tts_sink))
+    else:
+        speaker = NullSpeaker(args.speech_rate)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        user_id = setup_database(os.path.join(tmp, "bench.db"))
+        tracing.reset()
+        turns = 0
+        started = time.monotonic()
+
+        for _ in range(args.repeat):
+            for scenario in scenarios:
+                chat_history = []
+                for turn in scenario["turns"]:
+                    stub.generate_reply = turn.get("generate")
+                    tracing.start_turn(label=scenario["name"])
+
+                    transcript = turn["transcript"]
+                    if turn.get("wav"):
+                        path = os.path.join(FIXTURE_DIR, turn["wav"])
+                        if not os.path.exists(path):
+                            make_fixture(path, seed=sum(map(ord, turn["wav"])))
+                        fake_pa.queue_wav(path)
+                        audio = stt.record_command(fake_pa, stt.SAMPLE_RATE, stt.CHUNK_SIZE)
+                        tracing.mark("speech_end")
+                        if args.stt:
+                            stt.transcribe_audio(audio, stt.SAMPLE_RATE)
+                    else:
+                        tracing.mark("speech_end")
+                    tracing.mark("transcript")
+
+                    result = ai_corestreaming2.process_command(transcript, speaker, chat_history, user_id)
+                    tracing.end_turn(result=result)
+                    turns += 1
+
+        elapsed = time.monotonic() - started
+
+    stub.stop()
+    return {
+        "turns": turns,
+        "elapsed": elapsed,
+        "turns_per_second": turns / elapsed if elapsed else 0.0,
+        "llm_requests": stub.requests,
+        "tokens_served": stub.tokens_served,
+        "audio_frames_read": fake_pa.frames_read,
+        "latency": tracing.summary(),
+    }
+
+
+class TimedPorcupine:
+    """
+    Wraps the real Porcupine handle inside mainwakeword2's loop: times every
+    process() call, notes where in the replayed audio the wake word fired and
+    stops the loop if the fixture runs out without a detection.
+    """
+
+    def __init__(self, handle, max_frames):
+        self.handle = handle
+        self.sample_rate = handle.sample_rate
+        self.frame_length = handle.frame_length
+        self.max_frames = max_frames
+        self.frames = 0
+        self.process_time = 0.0
+        self.detected_at = None
+        self.detected_wall = None
+
+    def process(self, pcm):
+        if self.frames >= self.max_frames:
+            raise KeyboardInterrupt  # same exit as Ctrl+C: main() cleans up and returns
+        start = time.perf_counter()
+        result = self.handle.process(pcm)
+        self.process_time += time.perf_counter() - start
+        self.frames += self.frame_length
+        if result >= 0 and self.detected_at is None:
+            self.detected_at = self.frames / self.sample_rate
+            self.detected_wall = time.monotonic()
+        return result
+
+    def delete(self):
+        self.handle.delete()
+
+
+def bench_wakeword(args):
+    """
+    Runs the real mainwakeword2.main() loop on a wake-word fixture (needs
+    PORCUPINE_ACCESS_KEY): Porcupine detection, the "Yes?" prompt, user
+    identification, up to the greeting, where the loop is stopped.
+    """
+    if "PORCUPINE_ACCESS_KEY" not in os.environ or not args.wakeword_wav:
+        return None
+
+    import builtins
+    import pvporcupine
+    import pyaudio
+    import mainwakeword2
+
+    fake_pa = FakePyAudio(speed=args.speed)
+    fake_pa.queue_wav(args.wakeword_wav)
+    fixture_frames = len(fake_pa.pending) // 2
+    real_create = pvporcupine.create
+    porcupine = None
+    greeted = []
+
+    def create(**kwargs):
+        nonlocal porcupine
+        # Allow one extra second of trailing silence for a late detection
+        porcupine = TimedPorcupine(real_create(**kwargs), fixture_frames + 16000)
+        return porcupine
+
+    def speak(text):
+        if text.startswith("Hello"):
+            greeted.append(time.monotonic())
+            raise KeyboardInterrupt  # the wake path is done; don't start listening for commands
+
+    originals = (pvporcupine.create, pyaudio.PyAudio, mainwakeword2.speak, builtins.input)
+    pvporcupine.create = create
+    pyaudio.PyAudio = lambda: fake_pa
+    mainwakeword2.speak = speak
+    builtins.input = lambda prompt="": "Bench"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            setup_database(os.path.join(tmp, "wake.db"))
+            mainwakeword2.main()
+    finally:
+        pvporcupine.create, pyaudio.PyAudio, mainwakeword2.speak, builtins.input = originals
+
+    if porcupine is None or not porcupine.frames:
+        return None
+    return {
+        "detected_at_audio_seconds": porcupine.detected_at,
+        "process_seconds_per_audio_second": porcupine.process_time / (porcupine.frames / porcupine.sample_rate),
+        "detection_to_greeting_seconds": greeted[0] - porcupine.detected_wall if greeted and porcupine.detected_wall else None,
+    }
+
+
+# --- REPORTING AND REGRESSION CHECK ---
+def print_report(results):
+    print(f"\n🏁 {results['turns']} turns in {results['elapsed']:.2f}s "
+          f"({results['turns_per_second']:.2f} turns/s, {results['llm_requests']} LLM requests, "
+          f"{results['tokens_served']} tokens)")
+    print(f"  {'metric':<28}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, values in results["latency"].items():
+        print(f"  {name:<28}{values['count']:>6}{values['p50']:>9.3f}{values['p95']:>9.3f}{values['p99']:>9.3f}")
+    if results.get("wakeword"):
+        print(f"  wake word: {results['wakeword']}")
+
+
+def check_regressions(results, baseline, tolerance, slack):
+    """Returns a list of human-readable regressions (empty when all is well)."""
+    failures = []
+    for metric in REGRESSION_METRICS:
+        current = results["latency"].get(metric)
+        previous = baseline["latency"].get(metric)
+        if not current or not previous:
+            continue
+        for point in ("p50", "p95"):
+            limit = previous[point] * (1 + tolerance) + slack
+            if current[point] > limit:
+                failures.append(f"{metric} {point}: {current[point]:.3f}s > {limit:.3f}s (baseline {previous[point]:.3f}s)")
+
+    min_throughput = baseline["turns_per_second"] * (1 - tolerance)
+    if results["turns_per_second"] < min_throughput:
+        failures.append(f"throughput: {results['turns_per_second']:.2f} turns/s < {min_throughput:.2f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark.")
+    parser.add_argument("--scenarios", default=SCENARIO_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=3, help="times to run every scenario")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio replay speed (0 = as fast as possible)")
+    parser.add_argument("--stt", action="store_true", help="run Whisper on the replayed audio")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="stub LLM delay before the first token (s)")
+    parser.add_argument("--token-rate", type=float, default=25.0, help="stub LLM tokens per second")
+    parser.add_argument("--speech-rate", type=float, default=0.0, help="simulated TTS words/s (0 = instant)")
+    parser.add_argument("--wakeword-wav", help="fixture containing the wake word, replayed through the mainwakeword2 loop")
+    parser.add_argument("--tts-sink", help="synthesize (but don't play) replies with this TTS backend instead of the null sink")
+    parser.add_argument("--tts-bench", help="comma-separated TTS backends to benchmark instead of running scenarios")
+    parser.add_argument("--reminder-bench", type=int, metavar="N", help="benchmark reminder search over N reminders instead of running scenarios")
+    parser.add_argument("--reminder-users", type=int, default=100, help="users the --reminder-bench reminders are spread over")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown vs baseline")
+    parser.add_argument("--slack", type=float, default=0.05, help="allowed absolute slowdown vs baseline (s)")
+    args = parser.parse_args()
+
+    if args.tts_bench:
+        print("\n🔊 TTS backends (seconds):")
+        bench_tts(args.tts_bench.split(","), args.repeat)
+        return 0
+
+    if args.reminder_bench:
+        print("\n🗃️ Reminder search:")
+        bench_reminders(args.reminder_bench, users=args.reminder_users)
+        return 0
+
+    with open(args.scenarios) as f:
+        scenarios = json.load(f)
+
+    results = run_scenarios(scenarios, args)
+    results["wakeword"] = bench_wakeword(args)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        # A missing baseline must not pass: a fresh checkout would never catch a regression
+        print(f"❌ No baseline at {args.baseline}; run with --save-baseline on a reference machine to create one.")
+        return 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    failures = check_regressions(results, baseline, args.tolerance, args.slack)
+    if failures:
+        print("❌ Latency regressions against baseline:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import re
+import math
+from collections import Counter
+
+from segmenter import SentenceSegmenter
+from utils2 import SEARCH_CONTEXT_TOKEN_BUDGET
+
+# --- QUERY-FOCUSED SEARCH CONTEXT COMPRESSION ---
+# Search results are split into sentences, every sentence is scored against
+# the search query and the user's transcript with BM25, and the best ones are
+# kept until the token budget runs out. Near-duplicate sentences (the same
+# fact syndicated across sources) are only kept once. The survivors are put
+# back in their original order under their source URL, so the prompt still
+# reads as per-source excerpts, just much shorter.
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+DUPLICATE_OVERLAP = 0.8     # word-set Jaccard above which two sentences count as the same
+MAX_SENTENCE_CHARS = 400    # sentences without punctuation are cut here
+CHARS_PER_TOKEN = 4         # rough estimate for English text; no tokenizer needed
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "by", "from",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those", "as",
+    "do", "does", "did", "what", "who", "whom", "which", "when", "where", "why", "how", "i", "me",
+    "my", "you", "your", "we", "our", "can", "could", "would", "should", "will", "about", "tell",
+    "please", "hey", "alex",
+}
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def terms(text):
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS]
+
+
+def split_sentences(text):
+    """Reuses the TTS segmenter (abbreviation/decimal aware) with early splits disabled."""
+    segmenter = SentenceSegmenter(min_words=1, first_chunk_min_chars=math.inf, max_chars=MAX_SENTENCE_CHARS)
+    sentences = segmenter.feed(" ".join(text.split()) + " ")
+    last = segmenter.flush()
+    if last:
+        sentences.append(last)
+    return sentences
+
+
+def bm25_scores(query_terms, documents):
+    """BM25 score of every tokenized document against the query terms."""
+    if not documents:
+        return []
+    average_length = sum(len(doc) for doc in documents) / len(documents) or 1.0
+    document_frequency = Counter(term for doc in documents for term in set(doc))
+    total = len(documents)
+
+    scores = []
+    for doc in documents:
+        counts = Counter(doc)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average_length)
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def _is_duplicate(words, kept):
+    for other in kept:
+        union = len(words | other)
+        if union and len(words & other) / union >= DUPLICATE_OVERLAP:
+            return True
+    return False
+
+
+def compress_results(results, query, transcript="", budget=SEARCH_CONTEXT_TOKEN_BUDGET):
+    """
+    Builds the search context for the prompt from Tavily-style results
+    ([{"url", "content"}]). Returns (context, stats) where stats reports the
+    token estimate before and after compression.
+    """
+    candidates = []   # (source index, sentence index, text, terms)
+    for source, result in enumerate(results):
+        for position, sentence in enumerate(split_sentences(result.get("content") or "")):
+            candidates.append((source, position, sentence, terms(sentence)))
+
+    query_terms = terms(f"{query} {transcript}")
+    scores = bm25_scores(query_terms, [c[3] for c in candidates])
+    ranked = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+
+    selected, kept_words, used = [], [], 0
+    headers = set()
+    for i in ranked:
+        source, _, sentence, sentence_terms = candidates[i]
+        if scores[i] <= 0 and selected:
+            break  # nothing relevant left; an irrelevant filler sentence is worse than none
+        words = set(sentence_terms) or {sentence.lower()}
+        if _is_duplicate(words, kept_words):
+            continue
+
+        cost = estimate_tokens(sentence) + 1
+        if source not in headers:
+            cost += estimate_tokens(f"URL: {results[source].get('url', 'N/A')}\nContent: ")
+        if used + cost > budget:
+            continue  # a shorter sentence further down may still fit
+
+        selected.append(i)
+        kept_words.append(words)
+        headers.add(source)
+        used += cost
+
+    by_source = {}
+    for i in sorted(selected, key=lambda i: candidates[i][:2]):
+        by_source.setdefault(candidates[i][0], []).append(candidates[i][2])
+
+    context = ""
+    for source, sentences in by_source.items():
+        context += f"URL: {results[source].get('url', 'N/A')}\nContent: {' '.join(sentences)}\n\n"
+
+    original = sum(
+        estimate_tokens(f"URL: {r.get('url', 'N/A')}\nContent: {r.get('content', 'N/A')}\n\n") for r in results
+    )
+    stats = {
+        "sentences": len(candidates),
+        "kept": len(selected),
+        "tokens_before": original,
+        "tokens_after": estimate_tokens(context),
+    }
+    return context, stats
@@ -1,8 +1,10 @@
+import re
 import sqlite3
 import datetime
 
 # --- DATABASE CONFIGURATION ---
 DB_NAME = 'assistant_data.db'
+FTS_MIN_REMINDERS = 2000 # per-user list size from which the FTS5 lookup beats scanning the list (benchmark.py --reminder-bench)
 
 def init_db():
     """Initializes the database and creates the necessary tables."""
@@ -28,10 +30,50 @@ def init_db():
             FOREIGN KEY(user_id) REFERENCES users(id)
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminders_user ON reminders (user_id, is_completed)")
+
+    # 3. Full-text index over reminder descriptions (external content: the text
+    # lives only in `reminders`, the triggers keep the index in sync). user_id is
+    # indexed as a token too, so the per-user filter happens inside the index.
+    try:
+        create_reminder_index(cursor)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Full-text reminder search unavailable ({e}); falling back to a table scan.")
     
     conn.commit()
     conn.close()
 
+def create_reminder_index(cursor):
+    """Creates the FTS5 table and sync triggers, backfilling it the first time."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reminders_fts'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS reminders_fts USING fts5(
+            description,
+            user_id,
+            content='reminders',
+            content_rowid='reminder_id',
+            tokenize='porter unicode61'
+        )
+    """)
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS reminders_fts_insert AFTER INSERT ON reminders BEGIN
+            INSERT INTO reminders_fts (rowid, description, user_id) VALUES (new.reminder_id, new.description, new.user_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS reminders_fts_delete AFTER DELETE ON reminders BEGIN
+            INSERT INTO reminders_fts (reminders_fts, rowid, description, user_id) VALUES ('delete', old.reminder_id, old.description, old.user_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS reminders_fts_update AFTER UPDATE OF description, user_id ON reminders BEGIN
+            INSERT INTO reminders_fts (reminders_fts, rowid, description, user_id) VALUES ('delete', old.reminder_id, old.description, old.user_id);
+            INSERT INTO reminders_fts (rowid, description, user_id) VALUES (new.reminder_id, new.description, new.user_id);
+        END;
+    """)
+
+    if is_new:
+        # Index reminders created before the FTS table existed
+        cursor.execute("INSERT INTO reminders_fts (reminders_fts) VALUES ('rebuild')")
+
 # --- USER MANAGEMENT ---
 def add_user(user_id: int, name: str):
     """Adds or updates a user in the database."""
@@ -93,6 +135,75 @@ def get_user_reminders(user_id: int, is_completed: int = 0):
     conn.close()
     return reminders
 
+# Words that say nothing about which reminder is meant ("I've finished the ...")
+SEARCH_STOPWORDS = {
+    "i", "ive", "i've", "im", "i'm", "me", "my", "the", "a", "an", "to", "of", "for", "and", "on", "in",
+    "it", "that", "this", "is", "was", "done", "did", "finished", "complete", "completed", "mark",
+    "as", "reminder", "task", "remind", "about", "already", "just", "have", "has", "with",
+}
+
+def _search_terms(text: str):
+    """Distinct content words of a spoken description, in order."""
+    return list(dict.fromkeys(w for w in re.findall(r"[\w']+", text.lower()) if w not in SEARCH_STOPWORDS))
+
+def _rank_by_overlap(rows, terms, limit):
+    """Ranks (description, due_date, reminder_id) rows by the share of terms their description contains."""
+    scored = []
+    for description, due_date, reminder_id in rows:
+        shared = len(set(terms) & set(_search_terms(description)))
+        if shared:
+            scored.append((description, due_date, reminder_id, shared / len(terms)))
+    return sorted(scored, key=lambda row: -row[3])[:limit]
+
+def _scan_reminders(cursor, user_id, terms, limit, is_completed=0):
+    """Fallback ranking by shared words over all of the user's reminders."""
+    cursor.execute(
+        "SELECT description, due_date, reminder_id FROM reminders WHERE user_id = ? AND is_completed = ?",
+        (user_id, is_completed),
+    )
+    return _rank_by_overlap(cursor.fetchall(), terms, limit)
+
+def _fts_search(cursor, user_id, terms, limit, is_completed=0):
+    """FTS5 ranking by share of terms matched (porter-stemmed); bm25 only breaks ties, its idf spans every user."""
+    matched = {}  # reminder_id -> [terms matched, summed bm25, description, due_date]
+    # One indexed lookup per term, so we know which terms each reminder matched
+    for term in terms:
+        # Quoted so user words can't be parsed as FTS operators (AND, NEAR, ...)
+        match = f'user_id : "{int(user_id)}" AND description : "{term.replace(chr(34), "")}"'
+        cursor.execute("""
+            SELECT r.reminder_id, r.description, r.due_date, bm25(reminders_fts, 1.0, 0.0)
+            FROM reminders_fts
+            JOIN reminders r ON r.reminder_id = reminders_fts.rowid
+            WHERE reminders_fts MATCH ? AND r.is_completed = ?
+        """, (match, is_completed))
+        for reminder_id, description, due_date, rank in cursor.fetchall():
+            entry = matched.setdefault(reminder_id, [0, 0.0, description, due_date])
+            entry[0] += 1
+            entry[1] += rank
+    ranked = sorted(matched.items(), key=lambda item: (-item[1][0], item[1][1]))
+    return [(description, due_date, reminder_id, count / len(terms))
+            for reminder_id, (count, _, description, due_date) in ranked[:limit]]
+
+def search_reminders(user_id: int, text: str, limit: int = 3, is_completed: int = 0):
+    """Finds a user's reminders best matching free text: [(description, due_date, reminder_id, share of words matched)], best first."""
+    terms = _search_terms(text)
+    if not terms:
+        return []
+
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM reminders WHERE user_id = ? AND is_completed = ?", (user_id, is_completed))
+    matches = None
+    if cursor.fetchone()[0] >= FTS_MIN_REMINDERS:
+        try:
+            matches = _fts_search(cursor, user_id, terms, limit, is_completed)
+        except sqlite3.OperationalError:
+            pass  # No FTS5 in this SQLite build
+    if matches is None:
+        matches = _scan_reminders(cursor, user_id, terms, limit, is_completed)
+    conn.close()
+    return matches
+
 def mark_reminder_completed(reminder_id: int):
     """Marks a reminder as completed."""
     conn = sqlite3.connect(DB_NAME)
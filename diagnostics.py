@@ -0,0 +1,401 @@
+import os
+import sys
+import json
+import time
+import atexit
+import signal
+import socket
+import argparse
+import threading
+import traceback
+import socketserver
+from collections import Counter
+
+from utils2 import DIAG_SOCKET, PROFILE_INTERVAL, PROFILE_DIR
+
+# --- ON-DEMAND SAMPLING PROFILER + LIVE STATS ---
+# While disabled nothing samples: no sampler thread, no trace/profile hook.
+# The only standing cost is the control socket's listener thread, which
+# sleeps in select() and wakes every 0.5 s to check for shutdown.
+# When toggled on (SIGUSR1, or "profile" on the control socket) a daemon
+# thread samples every thread's stack via sys._current_frames() at a fixed
+# interval and counts folded stacks ("thread;file:func;file:func count"),
+# which flamegraph.pl / speedscope read directly. Toggling off writes the
+# profile to PROFILE_DIR.
+#
+# The control socket runs in its own thread, so it still answers while the
+# main loop is stuck inside Whisper or a blocking read:
+#
+#   python diagnostics.py stats          # counters as JSON
+#   python diagnostics.py profile        # toggle the profiler
+#   python diagnostics.py stacks         # one-off dump of every thread's stack
+#   kill -USR1 <pid>                     # toggle the profiler (handled between bytecodes of the main thread)
+#
+# Only SIGUSR1 is registered here; SIGINT stays with utils2.handle_interrupt.
+
+
+# --- INPUT FRAME ACCOUNTING ---
+class InputMeter:
+    """
+    Estimates microphone frames lost to overflow (reads use
+    exception_on_overflow=False, so PortAudio drops them silently): frames
+    the device produced since start() minus frames we actually read.
+    add() is a single integer addition so it can sit in the read loop.
+    """
+
+    def __init__(self, name, rate=16000, slack_frames=0):
+        self.name = name
+        self.rate = rate
+        self.slack_frames = slack_frames   # frames legitimately sitting in the device buffer
+        self.frames = 0
+        self.started = None
+        self.dropped_total = 0
+        self.frames_total = 0
+
+    def start(self, rate=None, slack_frames=None):
+        self.stop()
+        if rate is not None:
+            self.rate = rate
+        if slack_frames is not None:
+            self.slack_frames = slack_frames
+        self.frames = 0
+        self.started = time.monotonic()
+
+    def add(self, frames):
+        self.frames += frames
+
+    def stop(self):
+        if self.started is not None:
+            self.dropped_total += self._pending_drops()
+            self.frames_total += self.frames
+            self.started = None
+            self.frames = 0
+
+    def _pending_drops(self):
+        if self.started is None:
+            return 0
+        expected = int((time.monotonic() - self.started) * self.rate)
+        return max(0, expected - self.frames - self.slack_frames)
+
+    def dropped(self):
+        return self.dropped_total + self._pending_drops()
+
+
+_meters = {}
+
+
+def input_meter(name):
+    """Returns the named meter, creating it on first use."""
+    meter = _meters.get(name)
+    if meter is None:
+        meter = _meters[name] = InputMeter(name)
+    return meter
+
+
+# --- LIVE STATS ---
+_sources = {}
+_started_at = time.time()
+
+
+def register_source(name, func):
+    """Adds a callable returning a dict (or number) to the stats report, e.g. a server's status()."""
+    _sources[name] = func
+
+
+def rss_bytes():
+    """Current resident set size from /proc (Linux); falls back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def stats():
+    """Snapshot of the live counters. Modules are looked up, never imported, from here."""
+    report = {
+        "pid": os.getpid(),
+        "uptime": round(time.time() - _started_at, 1),
+        "rss_mb": None,
+        "threads": threading.active_count(),
+        "profiling": _profiler is not None and _profiler.running,
+    }
+    rss = rss_bytes()
+    if rss is not None:
+        report["rss_mb"] = round(rss / 2**20, 1)
+
+    tracing = sys.modules.get("tracing")
+    if tracing is not None:
+        report["turns"] = tracing.turn_count()
+
+    queues = {}
+    audio_output = sys.modules.get("audio_output")
+    if audio_output is not None and audio_output._output is not None:
+        queues["audio_output"] = audio_output._output.queue_depth()
+    local_intents = sys.modules.get("local_intents")
+    if local_intents is not None:
+        queues["timers"] = sum(t.is_alive() for t in local_intents.ACTIVE_TIMERS)
+        queues["announcements"] = len(local_intents.ANNOUNCEMENTS)
+    report["queues"] = queues
+
+    report["dropped_input_frames"] = {name: meter.dropped() for name, meter in _meters.items()}
+
+    for name, func in list(_sources.items()):
+        try:
+            report[name] = func()
+        except Exception as e:
+            report[name] = f"error: {e}"
+    return report
+
+
+# --- SAMPLING PROFILER ---
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _thread_names():
+    return {thread.ident: thread.name for thread in threading.enumerate()}
+
+
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.running = False
+        self.started = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.started = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="diag-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.running = False
+
+    def _run(self):
+        own = threading.get_ident()
+        names = _thread_names()
+        next_due = time.monotonic()
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            if len(frames) != len(names):
+                names = _thread_names()
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.samples[";".join(reversed(stack))] += 1
+            del frames
+            self.sample_count += 1
+
+            next_due += self.interval
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_due = time.monotonic()  # fell behind; don't try to catch up
+
+    def write(self, directory=PROFILE_DIR):
+        """Writes the folded stacks and returns the file path."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        path = os.path.join(directory, f"profile-{os.getpid()}-{stamp}.folded")
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def toggle_profiler(interval=None):
+    """Starts the profiler, or stops it and writes the profile. Returns a status message."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is not None and _profiler.running:
+            _profiler.stop()
+            path = _profiler.write()
+            message = f"profiler stopped: {_profiler.sample_count} samples written to {path}"
+            _profiler = None
+        else:
+            _profiler = SamplingProfiler(interval or PROFILE_INTERVAL)
+            _profiler.start()
+            message = f"profiler started ({1 / _profiler.interval:.0f} Hz)"
+    print(f"🔬 {message}")
+    return message
+
+
+def dump_stacks():
+    """Current stack of every thread, as text."""
+    names = _thread_names()
+    lines = []
+    for ident, frame in sys._current_frames().items():
+        lines.append(f"--- {names.get(ident, ident)} ---")
+        lines.extend(line.rstrip() for line in traceback.format_stack(frame))
+    return "\n".join(lines)
+
+
+# --- CONTROL SURFACE ---
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            parts = raw.decode(errors="replace").split()
+            if not parts:
+                continue
+            command, args = parts[0], parts[1:]
+            if command == "stats":
+                reply = json.dumps(stats(), indent=2)
+            elif command == "profile":
+                hz = _parse_hz(args[0]) if args else None
+                if args and hz is None:
+                    reply = f"error: sampling rate must be a number of Hz above 0, not {args[0]!r}"
+                else:
+                    reply = toggle_profiler(1 / hz if hz else None)
+            elif command == "stacks":
+                reply = dump_stacks()
+            else:
+                reply = "commands: stats | profile [hz] | stacks"
+            self.wfile.write(reply.encode() + b"\n\0\n")
+
+
+def _parse_hz(text):
+    """The sampling rate in text, or None unless it is a finite number above 0."""
+    try:
+        hz = float(text)
+    except ValueError:
+        return None
+    return hz if 0 < hz < float("inf") else None
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+_server = None
+
+
+def _on_sigusr1(signum, frame):
+    # Runs on the main thread; starting/stopping the sampler thread is all it does
+    toggle_profiler()
+
+
+def install(socket_path=DIAG_SOCKET):
+    """
+    Enables the toggles: SIGUSR1 (if nothing else owns it) and the control
+    socket. Safe to call more than once. Nothing is sampled until toggled.
+    """
+    global _server
+    if _server is not None:
+        return
+
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        if signal.getsignal(signal.SIGUSR1) in (signal.SIG_DFL, None):
+            signal.signal(signal.SIGUSR1, _on_sigusr1)
+
+    if not socket_path or not hasattr(socket, "AF_UNIX"):
+        return
+    if _socket_in_use(socket_path):
+        print(f"⚠️ Diagnostics socket {socket_path} belongs to another running process; "
+              f"set ALEX_DIAG_SOCKET to use a different one. SIGUSR1 still toggles the profiler.")
+        return
+    # Owner-only from the moment it exists (umask is process-wide, but only for this bind)
+    old_umask = os.umask(0o177)
+    try:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # left over from a crashed run
+        _server = _ControlServer(socket_path, _ControlHandler)
+    except OSError as e:
+        print(f"⚠️ Diagnostics socket unavailable ({e}); SIGUSR1 still toggles the profiler.")
+        return
+    finally:
+        os.umask(old_umask)
+    threading.Thread(target=_server.serve_forever, name="diag-control", daemon=True).start()
+    atexit.register(_shutdown, socket_path)
+
+
+def _socket_in_use(socket_path):
+    """True if something is accepting connections on socket_path (a stale file from a crashed run is not)."""
+    if not os.path.exists(socket_path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1.0)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def _shutdown(socket_path):
+    if _profiler is not None and _profiler.running:
+        toggle_profiler()
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+# --- CLIENT ---
+def send_command(command, socket_path=DIAG_SOCKET, timeout=5.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall(command.encode() + b"\n")
+        reply = b""
+        while not reply.endswith(b"\n\0\n"):
+            data = client.recv(65536)
+            if not data:
+                break
+            reply += data
+    return reply[:-3].decode() if reply.endswith(b"\n\0\n") else reply.decode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Talk to a running assistant's diagnostics socket.")
+    parser.add_argument("command", choices=("stats", "profile", "stacks"))
+    parser.add_argument("--hz", type=float, help="sampling rate when starting the profiler")
+    parser.add_argument("--socket", default=DIAG_SOCKET)
+    args = parser.parse_args()
+
+    command = args.command
+    if command == "profile" and args.hz:
+        command += f" {args.hz}"
+    try:
+        print(send_command(command, args.socket))
+    except OSError as e:
+        print(f"❌ Could not reach {args.socket}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
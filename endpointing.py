@@ -0,0 +1,66 @@
+import io
+import numpy as np
+
+from utils2 import SILENCE_THRESHOLD, SILENCE_DURATION, TRIM_FRAME_DURATION, TRIM_PADDING
+
+# --- VOLUME-BASED ENDPOINTING ---
+# Shared by record_command (local microphone) and the assistant server
+# (audio streamed from clients). Chunks can be any size; silence is counted
+# in samples so the stop condition doesn't depend on how audio is framed.
+# trim_silence() then cuts the recording down to the speech itself before
+# it goes to Whisper.
+
+
+class Endpointer:
+    def __init__(self, sample_rate, threshold=SILENCE_THRESHOLD, silence_duration=SILENCE_DURATION):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.silence_samples_needed = int(silence_duration * sample_rate)
+        self.reset()
+
+    def reset(self):
+        self.audio = io.BytesIO()
+        self.speaking = False
+        self.silence_samples = 0
+
+    def feed(self, data):
+        """Appends a chunk of 16-bit PCM; returns True once speech has been followed by enough silence."""
+        self.audio.write(data)
+
+        # --- Volume Check (Amplitude based) ---
+        audio_data = np.frombuffer(data, dtype=np.int16)
+        volume = np.max(np.abs(audio_data)) if len(audio_data) else 0
+
+        if volume > self.threshold:
+            self.silence_samples = 0
+            self.speaking = True # Start counting silence only after first speech
+        elif self.speaking:
+            self.silence_samples += len(audio_data)
+
+        # --- Stop Condition ---
+        return self.speaking and self.silence_samples >= self.silence_samples_needed
+
+
+def trim_silence(samples, sample_rate, threshold=SILENCE_THRESHOLD,
+                 frame_duration=TRIM_FRAME_DURATION, padding=TRIM_PADDING):
+    """
+    Returns the int16 samples between the first and last frame whose peak
+    exceeds `threshold`, widened by `padding` seconds on each side (empty if
+    no frame does). Drops the lead-in before the user talks and the
+    SILENCE_DURATION tail that ended the recording.
+    """
+    samples = np.asarray(samples, dtype=np.int16)
+    frame = max(1, int(frame_duration * sample_rate))
+    usable = len(samples) - len(samples) % frame
+    if usable == 0:
+        return samples[:0]
+
+    peaks = np.abs(samples[:usable].reshape(-1, frame).astype(np.int32)).max(axis=1)
+    loud = np.flatnonzero(peaks > threshold)
+    if len(loud) == 0:
+        return samples[:0]
+
+    pad = int(padding * sample_rate)
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame + pad)
+    return samples[start:end]
@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import diagnostics
+from utils2 import GOVERNOR_PHASES, GOVERNOR_ENABLED, GOVERNOR_ATTACH_RETRY, GOVERNOR_PAUSE_RENEW
+
+# --- CROSS-SUBSYSTEM RESOURCE GOVERNOR ---
+# Vision, Whisper, Porcupine and a local Ollama share a few cores. The
+# governor tracks which pipeline phase is running and gives the cores to
+# the stage the user is waiting on:
+#
+#   - vision: frame rate (0 pauses the camera publisher; the pause is
+#     re-sent every GOVERNOR_PAUSE_RENEW s while the phase lasts, so it
+#     lapses after frame_bus.BUS_MAX_PAUSE s only if we die) and OpenCV threads,
+#     both set through the shared frame bus header, so it works for every
+#     vision process attached to the bus (frame_bus.py --bus mode). Their
+#     niceness is fixed at startup instead (frame_bus.VISION_NICE): it
+#     could be raised per phase but never lowered again without privileges.
+#   - torch: intra-op threads for Whisper (only if torch is already loaded)
+#
+# Ollama runs in its own process and reloads the model whenever num_thread
+# changes, so the governor leaves it alone; it gets its cores by everything
+# else backing off while a reply is being generated.
+#
+# Phases nest: the assistant server can have one session transcribing while
+# another is speaking, so every phase is reference-counted and the most
+# latency-critical active one decides the allocation (GOVERNOR_PHASES order).
+
+IDLE = "idle"
+PHASE_ORDER = list(GOVERNOR_PHASES)   # most latency-critical first
+VISION_DIR = Path(__file__).parent / " modules" / "machinevision"
+
+
+def _threads(fraction, cores):
+    return max(1, round(fraction * cores))
+
+
+class Governor:
+    def __init__(self, phases=GOVERNOR_PHASES, enabled=GOVERNOR_ENABLED):
+        self.phases = phases
+        self.enabled = enabled
+        self.cores = os.cpu_count() or 1
+        self.active = {name: 0 for name in phases}
+        self.phase = None
+        self.current = {}
+        self.transitions = 0
+        self._bus = None
+        self._next_attach = 0.0
+        self._renewal = None
+        self._lock = threading.Lock()
+        self.enter(IDLE)
+
+    # --- PHASES ---
+    def enter(self, phase):
+        with self._lock:
+            self.active[phase] += 1
+            self._update()
+
+    def leave(self, phase):
+        with self._lock:
+            self.active[phase] = max(0, self.active[phase] - 1)
+            self._update()
+
+    @contextmanager
+    def during(self, phase):
+        """with GOVERNOR.during("transcribing"): ..."""
+        self.enter(phase)
+        try:
+            yield
+        finally:
+            self.leave(phase)
+
+    def _update(self):
+        phase = next((name for name in PHASE_ORDER if self.active[name] > 0), IDLE)
+        if phase == self.phase:
+            return
+        self.phase = phase
+        self.transitions += 1
+        self.current = self.plan(phase)
+        if self.enabled:
+            self._apply(self.current)
+            self._schedule_renewal()
+
+    def restore(self):
+        """Puts everything back to the idle allocation (at exit, so a vision pause never outlives us)."""
+        with self._lock:
+            if self._renewal is not None:
+                self._renewal.cancel()
+                self._renewal = None
+            if self.enabled and self.phase != IDLE:
+                self._apply(self.plan(IDLE))
+            if self._bus is not None:
+                self._bus.close()
+                self._bus = None
+
+    def _schedule_renewal(self):
+        """While vision is paused, re-sends the allocation before the bus lets the pause lapse (lock held)."""
+        if self._renewal is not None:
+            self._renewal.cancel()
+            self._renewal = None
+        if self.current["vision_fps"] <= 0:
+            self._renewal = threading.Timer(GOVERNOR_PAUSE_RENEW, self._renew)
+            self._renewal.daemon = True
+            self._renewal.start()
+
+    def _renew(self):
+        with self._lock:
+            if threading.current_thread() is not self._renewal:
+                return  # the phase changed while this timer was firing
+            self._apply(self.current)
+            self._schedule_renewal()
+
+    # --- ALLOCATION ---
+    def plan(self, phase):
+        """Turns a phase's fractions into concrete numbers for this machine."""
+        spec = self.phases[phase]
+        return {
+            "phase": phase,
+            "cores": self.cores,
+            "vision_fps": spec["vision_fps"],
+            "vision_threads": _threads(spec["vision_threads"], self.cores),
+            "torch_threads": _threads(spec["torch_threads"], self.cores),
+        }
+
+    def allocation(self):
+        """The allocation currently in force (also shown on the diagnostics stats socket)."""
+        with self._lock:
+            return {**self.current, "enabled": self.enabled, "vision_bus": self._bus is not None,
+                    "transitions": self.transitions}
+
+    def _apply(self, allocation):
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.get_num_threads() != allocation["torch_threads"]:
+            torch.set_num_threads(allocation["torch_threads"])
+
+        bus = self._vision_bus()
+        if bus is not None:
+            try:
+                bus.target_fps = allocation["vision_fps"]
+                bus.set_controls(allocation["vision_threads"])
+            except (ValueError, TypeError, OSError):
+                self._drop_bus()
+
+    def _drop_bus(self):
+        self._bus.close()
+        self._bus = None
+        self._next_attach = 0.0
+
+    def _vision_bus(self):
+        """The frame bus, if a publisher is running (looked up again every GOVERNOR_ATTACH_RETRY s)."""
+        if self._bus is not None:
+            try:
+                os.kill(self._bus.owner_pid, 0)
+                return self._bus
+            except ProcessLookupError:
+                # The publisher exited; its segment is gone for everyone else
+                self._drop_bus()
+            except PermissionError:
+                return self._bus
+
+        now = time.monotonic()
+        if now < self._next_attach:
+            return None
+        self._next_attach = now + GOVERNOR_ATTACH_RETRY
+        try:
+            if str(VISION_DIR) not in sys.path:
+                sys.path.append(str(VISION_DIR))
+            from frame_bus import FrameBusReader
+            self._bus = FrameBusReader(attach_timeout=0)
+            print(f"🎛️ Governor attached to the vision frame bus (publisher pid {self._bus.owner_pid}).")
+        except (ImportError, FileNotFoundError, ValueError):
+            self._bus = None
+        return self._bus
+
+
+GOVERNOR = Governor()
+diagnostics.register_source("governor", GOVERNOR.allocation)
+atexit.register(GOVERNOR.restore)
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+from session_protocol import HELLO, AUDIO, TEXT, BYE, WELCOME, PCM, END, encode, read_message, decode_json
+from benchmark import make_fixture, read_wav_pcm
+from tracing import RollingHistogram
+from utils2 import SERVER_HOST, SERVER_PORT, SILENCE_DURATION, CHUNK_DURATION
+
+# --- CONCURRENT-SESSION LOAD GENERATOR ---
+# Opens N simulated clients against assistant_server.py, each running a
+# number of turns back to back (spoken fixture or typed text), and reports
+# first-audio / turn latency per concurrency level. The capacity is the
+# largest level whose p95 first-audio latency stays under --target.
+#
+#   python assistant_server.py --stub-llm &
+#   python loadgen.py --clients 1,2,4,8 --turns 5 --target 3.0
+SAMPLE_RATE = 16000
+CHUNK_BYTES = int(SAMPLE_RATE * CHUNK_DURATION) * 2
+
+
+async def simulated_client(args, speech_pcm, results):
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError:
+        results["refused"] += 1
+        return
+
+    writer.write(encode(HELLO, {"user": args.user}))
+    kind, payload = await read_message(reader)
+    if kind != WELCOME or "error" in decode_json(payload):
+        results["rejected"] += 1
+        writer.close()
+        return
+
+    # Trailing silence long enough for the server's endpointer to close the utterance
+    silence = b"\x00" * (int(SAMPLE_RATE * (SILENCE_DURATION + CHUNK_DURATION)) * 2)
+
+    for _ in range(args.turns):
+        if args.text:
+            writer.write(encode(TEXT, {"text": args.text}))
+            speech_end = time.monotonic()
+        else:
+            audio = speech_pcm + silence
+            speech_end = None
+            for offset in range(0, len(audio), CHUNK_BYTES):
+                writer.write(encode(AUDIO, audio[offset:offset + CHUNK_BYTES]))
+                await writer.drain()
+                if speech_end is None and offset + CHUNK_BYTES >= len(speech_pcm):
+                    speech_end = time.monotonic()
+                await asyncio.sleep(CHUNK_DURATION / args.speed)
+        await writer.drain()
+
+        first_audio = None
+        while True:
+            kind, payload = await read_message(reader)
+            if kind is None:
+                results["errors"] += 1
+                return
+            if kind == PCM and first_audio is None:
+                first_audio = time.monotonic() - speech_end
+            if kind == END:
+                break
+
+        results["turn"].add(time.monotonic() - speech_end)
+        if first_audio is not None:
+            results["first_audio"].add(first_audio)
+        results["turns"] += 1
+
+    writer.write(encode(BYE))
+    writer.close()
+
+
+async def run_level(args, clients, speech_pcm):
+    results = {
+        "turn": RollingHistogram(window=100000),
+        "first_audio": RollingHistogram(window=100000),
+        "turns": 0, "rejected": 0, "refused": 0, "errors": 0,
+    }
+    started = time.monotonic()
+    await asyncio.gather(*(simulated_client(args, speech_pcm, results) for _ in range(clients)))
+    results["elapsed"] = time.monotonic() - started
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how many concurrent sessions one assistant server sustains.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--user", default="Alex", help="a user that exists in the server's database")
+    parser.add_argument("--clients", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--turns", type=int, default=5, help="turns per client")
+    parser.add_argument("--wav", help="utterance to stream (16-bit mono 16 kHz); a synthetic one by default")
+    parser.add_argument("--text", help="send this typed command instead of audio (skips STT)")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio streaming speed vs real time")
+    parser.add_argument("--target", type=float, default=3.0, help="p95 first-audio latency budget (s)")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be greater than 0")
+
+    if args.wav:
+        speech_pcm = read_wav_pcm(args.wav)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "utterance.wav")
+            make_fixture(path, lead_silence=0.0)
+            speech_pcm = read_wav_pcm(path)
+
+    capacity = 0
+    print(f"  {'clients':>8}{'turns':>7}{'turns/s':>9}{'first audio p50':>17}{'p95':>8}{'turn p95':>10}{'rejected':>10}")
+    for clients in [int(c) for c in args.clients.split(",")]:
+        results = asyncio.run(run_level(args, clients, speech_pcm))
+        first = results["first_audio"].percentiles() or {"p50": float("nan"), "p95": float("nan")}
+        turn = results["turn"].percentiles() or {"p95": float("nan")}
+        throughput = results["turns"] / results["elapsed"] if results["elapsed"] else 0.0
+        print(f"  {clients:>8}{results['turns']:>7}{throughput:>9.2f}{first['p50']:>16.2f}s{first['p95']:>7.2f}s"
+              f"{turn['p95']:>9.2f}s{results['rejected'] + results['refused']:>10}")
+
+        if results["turns"] and first["p95"] <= args.target and not (results["rejected"] or results["errors"]):
+            capacity = clients
+
+    print(f"\n📈 Capacity: {capacity} concurrent sessions within a {args.target:.1f}s p95 first-audio budget.")
+    return 0 if capacity else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
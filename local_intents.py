@@ -0,0 +1,358 @@
+import re
+import atexit
+import datetime
+import threading
+from collections import deque, Counter
+
+from database2 import get_user_reminders
+
+# --- LOCAL INTENT REGISTRY ---
+# Every local intent declares its trigger phrases and a handler. All phrases
+# are compiled into one Aho-Corasick automaton, so the transcript is scanned
+# once no matter how many intents are registered. A handler may return None
+# to decline (e.g. a conversion it can't parse) and the next match is tried.
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over the text finds every pattern."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, pattern, value):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append((len(pattern), value))
+
+    def build(self):
+        """Computes the failure links (breadth first)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text):
+        """Returns (start, end, value) for every pattern occurrence in text."""
+        found = []
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                found.append((i - length + 1, i + 1, value))
+        return found
+
+
+class LocalIntent:
+    def __init__(self, name, patterns, handler, priority):
+        self.name = name
+        self.patterns = patterns
+        self.handler = handler
+        self.priority = priority
+
+
+class LocalIntentRegistry:
+    def __init__(self):
+        self.intents = []
+        self.checks = 0
+        self.hits = Counter()
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def register(self, name, patterns, handler, priority=0):
+        """Adds an intent; lower priority numbers win when several intents match."""
+        self.intents.append(LocalIntent(name, [normalize(p) for p in patterns], handler, priority))
+        self._matcher = None
+
+    def intent(self, name, patterns, priority=0):
+        """Decorator form of register()."""
+        def decorator(handler):
+            self.register(name, patterns, handler, priority)
+            return handler
+        return decorator
+
+    def _compile(self):
+        matcher = AhoCorasick()
+        for intent in self.intents:
+            for pattern in intent.patterns:
+                matcher.add(pattern, intent)
+        matcher.build()
+        self._matcher = matcher
+
+    def match(self, transcript):
+        """Returns the matching intents (best first), each with the phrase that triggered it."""
+        if self._matcher is None:
+            self._compile()
+
+        text = normalize(transcript)
+        matches = {}
+        for start, end, intent in self._matcher.search(text):
+            # Whole words only, so "date" doesn't fire inside "update"
+            if start > 0 and text[start - 1] != " ":
+                continue
+            if end < len(text) and text[end] != " ":
+                continue
+            if intent.name not in matches:
+                matches[intent.name] = (intent, text[start:end])
+
+        return sorted(matches.values(), key=lambda item: item[0].priority)
+
+    def handle(self, transcript, speak_func, user_id=None):
+        """Runs the first matching handler that accepts the transcript. Returns its result or None."""
+        with self._lock:
+            self.checks += 1
+
+        for intent, phrase in self.match(transcript):
+            result = intent.handler(transcript, speak_func, user_id)
+            if result is not None:
+                print(f"🧠 Decision: Local intent '{intent.name}' ('{phrase}').")
+                with self._lock:
+                    self.hits[intent.name] += 1
+                return result
+        return None
+
+    def stats(self):
+        handled = sum(self.hits.values())
+        return {
+            "checks": self.checks,
+            "handled": handled,
+            "hit_rate": handled / self.checks if self.checks else 0.0,
+            "by_intent": dict(self.hits),
+        }
+
+
+def normalize(text):
+    """Lowercase, punctuation to spaces (apostrophes, hyphens and decimal points kept), single spaces."""
+    return " ".join(re.sub(r"[^\w'.\-]+|\.(?!\d)", " ", text.lower()).split())
+
+
+LOCAL_INTENTS = LocalIntentRegistry()
+
+HANDLED = {"action": "LOCAL_HANDLED", "response_spoken": True}
+
+# "what time is it in Tokyo", "what day was it at 9 yesterday": the local clock
+# can't answer these, so the clock intents decline and the LLM gets the turn.
+# Fillers like "at the moment" or "in a sec" are not qualifiers.
+CLOCK_QUALIFIERS = re.compile(
+    r"\bin (?!(?:a|one|just a) (?:sec|second|minute|moment|bit)\b|the moment\b|here\b|general\b)\w"
+    r"|\bat (?:\d|noon|midnight)\b|\b(?:tomorrow|yesterday|next|last|ago|from now)\b"
+)
+
+
+def _qualified(transcript):
+    return bool(CLOCK_QUALIFIERS.search(normalize(transcript)))
+
+
+# --- BUILT-IN INTENTS ---
+@LOCAL_INTENTS.intent("exit", ["stop listening", "thank you", "that's all", "nothing else"])
+def _exit(transcript, speak_func, user_id):
+    speak_func("You got it. I'm going back to quiet listening now.")
+    return {"action": "EXIT_CONVERSATION"}
+
+
+@LOCAL_INTENTS.intent("time", ["what time is it", "what's the time", "what is the time", "tell me the time", "current time"], priority=1)
+def _time(transcript, speak_func, user_id):
+    if _qualified(transcript):
+        return None
+    now = datetime.datetime.now().strftime("%-I:%M %p")
+    speak_func(f"Oh, sure thing! It's {now} right now.")
+    return HANDLED
+
+
+@LOCAL_INTENTS.intent("date", ["what's the date", "what is the date", "what date is it", "today's date", "what's today's date"], priority=1)
+def _date(transcript, speak_func, user_id):
+    if _qualified(transcript):
+        return None
+    today = datetime.date.today().strftime("%A, %B %-d, %Y")
+    speak_func(f"Today's {today}.")
+    return HANDLED
+
+
+@LOCAL_INTENTS.intent("day_of_week", ["what day is it", "what day is today", "what's the day", "day of the week"], priority=1)
+def _day_of_week(transcript, speak_func, user_id):
+    if _qualified(transcript):
+        return None
+    speak_func(f"It's {datetime.date.today().strftime('%A')}.")
+    return HANDLED
+
+
+@LOCAL_INTENTS.intent("reminder_count", ["how many reminders", "how many tasks", "how many things on my list", "how many to dos"], priority=1)
+def _reminder_count(transcript, speak_func, user_id):
+    if user_id is None:
+        return None
+    count = len(get_user_reminders(user_id=user_id))
+    if count == 0:
+        speak_func("You don't have any pending reminders.")
+    else:
+        speak_func(f"You've got {count} pending {'reminder' if count == 1 else 'reminders'}.")
+    return HANDLED
+
+
+# --- TIMERS ---
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20, "thirty": 30,
+    "forty": 40, "forty-five": 45, "sixty": 60, "ninety": 90,
+}
+TIMER_UNITS = {"second": 1, "minute": 60, "hour": 3600}
+TIMER_PATTERN = re.compile(r"(\d+(?:\.\d+)?|[a-z-]+)\s+(second|minute|hour)s?\b")
+
+ACTIVE_TIMERS = []
+
+# Timers fire on their own thread. Speaking from there would talk over
+# record_command in the local loop, or write into a server session that has
+# since closed, so the announcement is queued and the loop that owns the
+# speak function delivers it at a safe point (deliver_announcements() between
+# turns locally, the server's scheduler per session).
+ANNOUNCEMENTS = deque()   # (speak_func, text)
+_announcements_lock = threading.Lock()
+
+
+def _announce(speak_func, text):
+    with _announcements_lock:
+        ANNOUNCEMENTS.append((speak_func, text))
+
+
+def take_announcements(ready=None):
+    """Removes and returns the queued (speak_func, text) pairs for which ready(speak_func) is true (all by default)."""
+    with _announcements_lock:
+        taken = [item for item in ANNOUNCEMENTS if ready is None or ready(item[0])]
+        for item in taken:
+            ANNOUNCEMENTS.remove(item)
+    return taken
+
+
+def deliver_announcements():
+    """Speaks every queued announcement on the calling thread (single-owner loops like mainwakeword2)."""
+    for speak_func, text in take_announcements():
+        speak_func(text)
+
+
+def _parse_amount(word):
+    try:
+        return float(word)
+    except ValueError:
+        return NUMBER_WORDS.get(word)
+
+
+@LOCAL_INTENTS.intent("timer", ["set a timer", "start a timer", "set timer", "timer for"], priority=2)
+def _timer(transcript, speak_func, user_id):
+    match = TIMER_PATTERN.search(normalize(transcript))
+    if not match:
+        return None
+    amount = _parse_amount(match.group(1))
+    if not amount:
+        return None
+
+    unit = match.group(2)
+    seconds = amount * TIMER_UNITS[unit]
+    label = f"{match.group(1)} {unit}{'' if amount == 1 else 's'}"
+
+    timer = threading.Timer(seconds, _announce, args=(speak_func, f"Time's up! Your {match.group(1)} {unit} timer is done."))
+    timer.daemon = True
+    timer.start()
+    ACTIVE_TIMERS[:] = [t for t in ACTIVE_TIMERS if t.is_alive()] + [timer]
+
+    speak_func(f"Okay, {label}, starting now.")
+    return HANDLED
+
+
+# --- UNIT CONVERSIONS ---
+# unit -> (dimension, factor to the base unit); temperatures are special-cased
+UNITS = {
+    "kilometer": ("length", 1000.0), "kilometre": ("length", 1000.0), "km": ("length", 1000.0),
+    "meter": ("length", 1.0), "metre": ("length", 1.0),
+    "centimeter": ("length", 0.01), "centimetre": ("length", 0.01), "cm": ("length", 0.01),
+    "mile": ("length", 1609.344), "foot": ("length", 0.3048), "feet": ("length", 0.3048),
+    "inch": ("length", 0.0254), "yard": ("length", 0.9144),
+    "kilogram": ("mass", 1.0), "kilo": ("mass", 1.0), "kg": ("mass", 1.0),
+    "gram": ("mass", 0.001), "pound": ("mass", 0.45359237), "lb": ("mass", 0.45359237),
+    "ounce": ("mass", 0.028349523125),
+    "liter": ("volume", 1.0), "litre": ("volume", 1.0), "gallon": ("volume", 3.785411784),
+    "celsius": ("temperature", None), "fahrenheit": ("temperature", None), "kelvin": ("temperature", None),
+}
+CONVERSION_PATTERN = re.compile(
+    r"(-?\d+(?:\.\d+)?)\s*(?:degrees?\s+)?([a-z]+)\s+(?:in|to|into)\s+(?:degrees?\s+)?([a-z]+)\b"
+)
+
+
+def _unit_name(word):
+    """Maps "miles"/"inches"/"celsius" to the singular key used in UNITS."""
+    for candidate in (word, word[:-1], word[:-2]):
+        if candidate in UNITS:
+            return candidate
+    return None
+
+
+def _to_kelvin(value, unit):
+    if unit == "celsius":
+        return value + 273.15
+    if unit == "fahrenheit":
+        return (value - 32) * 5 / 9 + 273.15
+    return value
+
+
+def _from_kelvin(value, unit):
+    if unit == "celsius":
+        return value - 273.15
+    if unit == "fahrenheit":
+        return (value - 273.15) * 9 / 5 + 32
+    return value
+
+
+def convert_units(value, source, target):
+    """Converts between two known units of the same dimension, or returns None."""
+    if source not in UNITS or target not in UNITS:
+        return None
+    source_dim, source_factor = UNITS[source]
+    target_dim, target_factor = UNITS[target]
+    if source_dim != target_dim:
+        return None
+    if source_dim == "temperature":
+        return _from_kelvin(_to_kelvin(value, source), target)
+    return value * source_factor / target_factor
+
+
+@LOCAL_INTENTS.intent("unit_conversion", ["convert"] + sorted(set(UNITS) | {unit + "s" for unit in UNITS} | {"inches"}), priority=3)
+def _unit_conversion(transcript, speak_func, user_id):
+    match = CONVERSION_PATTERN.search(normalize(transcript))
+    if not match:
+        return None
+
+    amount, source_word, target_word = match.groups()
+    result = convert_units(float(amount), _unit_name(source_word), _unit_name(target_word))
+    if result is None:
+        return None
+
+    speak_func(f"{amount} {source_word} is about {round(result, 2):g} {target_word}.")
+    return HANDLED
+
+
+# --- HIT RATE REPORT ---
+def print_stats():
+    stats = LOCAL_INTENTS.stats()
+    if not stats["checks"]:
+        return
+    print(f"🧮 Local intents answered {stats['handled']}/{stats['checks']} commands "
+          f"({stats['hit_rate']:.0%}) without the LLM: {stats['by_intent']}")
+
+
+atexit.register(print_stats)
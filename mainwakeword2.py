@@ -15,13 +15,19 @@ from utils2 import check_environment, get_keyword_path, KEYWORD_FILENAME, MAX_FO
 # Imports the functions and the derived audio constants from stt_tts.py
 from stt_tts2 import record_command, transcribe_audio, speak, SAMPLE_RATE, CHUNK_SIZE 
 from ai_corestreaming2 import process_command 
-from database2 import get_user_id_by_name, get_user_name_by_id # NEW IMPORT
+from local_intents import ANNOUNCEMENTS, deliver_announcements
+from database2 import init_db, get_user_id_by_name, get_user_name_by_id # NEW IMPORT
+import tracing
+import diagnostics
 
 def main():
     
     # 1. INITIAL SETUP
     check_environment()
     keyword_file_path = get_keyword_path()
+    init_db() # creates/backfills the reminder search index on older databases
+    diagnostics.install() # SIGUSR1 / control socket; idle until toggled
+    wake_meter = diagnostics.input_meter("wakeword")
 
     # 2. PORCUPINE INITIALIZATION
     try:
@@ -62,12 +68,21 @@ def main():
                         frames_per_buffer=porcupine.frame_length,
                         input_device_index=None
                     )
+                    wake_meter.start(porcupine.sample_rate, porcupine.frame_length)
                     
                     while not conversation_mode:
+                        if ANNOUNCEMENTS:
+                            # A timer went off: speak it here, between frames, not from the timer thread
+                            wake_meter.stop()
+                            deliver_announcements()
+                            wake_meter.start(porcupine.sample_rate, porcupine.frame_length)
+
                         pcm = stream.read(porcupine.frame_length, exception_on_overflow=False)
+                        wake_meter.add(porcupine.frame_length)
                         pcm_unpacked = struct.unpack_from("h" * porcupine.frame_length, pcm)
                         
                         if porcupine.process(pcm_unpacked) >= 0:
+                            wake_meter.stop() # the stream sits unread while we greet/identify
                             print("✅ Wake word detected!")
                             speak("Yes?") 
                             
@@ -106,6 +121,7 @@ def main():
                     continue 
                     
                 finally:
+                    wake_meter.stop()
                     if stream and stream.is_active():
                          stream.stop_stream()
                          stream.close()
@@ -123,8 +139,13 @@ def main():
                         current_user_id = None # Final reset
                         break 
                         
+                    # Due timers are announced before listening, never over the recording
+                    deliver_announcements()
+
                     # Start command recording (Volume-based, auto-stop)
+                    tracing.start_turn()
                     raw_audio_io = record_command(pa, SAMPLE_RATE, CHUNK_SIZE)
+                    tracing.mark("speech_end")
                     
                     # Check for recording length (to ignore short microphone bumps)
                     raw_audio_io.seek(0, io.SEEK_END)
@@ -135,16 +156,19 @@ def main():
                     
                     if num_samples < SAMPLE_RATE * 0.5:
                         print("⏱️ Recording too short, ignoring.")
+                        tracing.cancel_turn()
                         continue
                     
                     # Transcribe and process
                     try:
                         transcript = transcribe_audio(raw_audio_io, SAMPLE_RATE) 
+                        tracing.mark("transcript")
                         
                         if transcript:
                             
                             # PASS THE USER ID TO THE PROCESSOR
                             result = process_command(transcript, speak, chat_history, current_user_id) 
+                            tracing.end_turn(result=result)
                             
                             last_activity_time = time.time() 
                             
@@ -158,9 +182,11 @@ def main():
                             
                         else:
                             print("🤐 No transcribable speech detected.")
+                            tracing.end_turn(result="NO_SPEECH")
                             
                     except Exception as e:
                         print(f"❌ Error during transcription/processing: {e}")
+                        tracing.end_turn(result="ERROR")
                         
     except KeyboardInterrupt:
         pass 
@@ -0,0 +1,153 @@
+import re
+import time
+import atexit
+import threading
+
+import tracing
+import diagnostics
+from tracing import RollingHistogram
+from utils2 import (
+    MODEL_TIERS, CASCADE_LATENCY_TARGET, CASCADE_LATENCY_WINDOW,
+    CASCADE_COMPLEX_WORDS, CASCADE_MIN_SAMPLES, CASCADE_PROBE_EVERY,
+)
+
+# --- LATENCY-AWARE MODEL CASCADE ---
+# Picks which Ollama model answers a turn. Short conversational turns go to
+# the small "fast" tier; long or reasoning-heavy turns go to the "large" tier.
+# The fast tier's first sentence is checked before it is spoken: if it looks
+# like a refusal, a shrug, markdown/code or nothing at all, the turn is
+# re-asked on the large tier and the user never hears the rejected answer.
+# When the large tier's recent median first-token time is over
+# CASCADE_LATENCY_TARGET, complex turns are downgraded to the fast tier
+# (the quality gate still escalates the ones it can't handle). Every
+# CASCADE_PROBE_EVERY-th downgrade goes to the large tier anyway, so its
+# latency figures keep updating once the host is less busy.
+#
+# This module only holds the policy and the stats; the HTTP streaming lives
+# in ai_corestreaming2.send_to_ollama.
+
+FAST, LARGE = "fast", "large"
+
+COMPLEX_CUES = re.compile(
+    r"\b(explain|why|how (?:does|do|did|can|would)|compare|difference|versus|vs|pros and cons|"
+    r"step by step|summari[sz]e|analy[sz]e|write|code|program|debug|calculate|plan|recommend|"
+    r"translate|essay|story|poem)\b"
+)
+# Refusals and shrugs as they open a reply ("I can't help with that", not
+# "I can't wait to..."), plus markdown/code that would be read out literally
+REJECT_PATTERNS = re.compile(
+    r"^(?:(?:i'm )?sorry,? (?:but )?)?(?:"
+    r"i (?:can(?:'|no)t|am unable to|'m unable to|am not able to|'m not able to) "
+    r"(?:help|assist|answer|provide|do that|access|browse|give|tell|share|find)\b|"
+    r"i(?:'m| am) not sure\b|i don'?t (?:know|have (?:access|information|real-time))\b)"
+    r"|\bas an ai\b|```|^#|\*\*"
+)
+# Besides letters and spaces, what a spoken answer is normally made of
+SPEAKABLE_PUNCTUATION = set(".,!?'\"-:;%()$€£/&+")
+
+
+def is_complex(transcript, has_context=False):
+    """Cheap complexity heuristic: long turns, reasoning/creative cues, or grounded answers over search results."""
+    text = transcript.lower()
+    if has_context:
+        return True
+    if len(text.split()) > CASCADE_COMPLEX_WORDS or text.count("?") > 1:
+        return True
+    return bool(COMPLEX_CUES.search(text))
+
+
+def passes_quality_gate(first_chunk):
+    """Checks the fast tier's first sentence before it is spoken."""
+    if not first_chunk or not first_chunk.strip():
+        return False
+    if REJECT_PATTERNS.search(first_chunk.lower()):
+        return False
+    # Mostly symbols usually means code, JSON or garbage ("It's 3.5 km, about 2 hours" is fine)
+    speakable = sum(ch.isalnum() or ch.isspace() or ch in SPEAKABLE_PUNCTUATION for ch in first_chunk)
+    return speakable / len(first_chunk) > 0.8
+
+
+class ModelCascade:
+    def __init__(self, tiers=MODEL_TIERS, latency_target=CASCADE_LATENCY_TARGET):
+        self.tiers = tiers
+        self.latency_target = latency_target
+        self.first_token = {name: RollingHistogram(window=CASCADE_LATENCY_WINDOW) for name in tiers}
+        self.counts = {name: {"chosen": 0, "answered": 0} for name in tiers}
+        self.escalations = 0
+        self.downgrades = 0
+        self._since_probe = 0
+        self._lock = threading.Lock()
+
+    def settings(self, tier):
+        return self.tiers[tier]
+
+    def recent_first_token(self, tier):
+        """Median first-token time over the rolling window (None until there are enough samples)."""
+        histogram = self.first_token[tier]
+        if len(histogram.samples) < CASCADE_MIN_SAMPLES:
+            return None
+        return histogram.percentiles((50,))["p50"]
+
+    def choose(self, transcript, has_context=False):
+        """Returns the tier to try first for this turn."""
+        tier = LARGE if is_complex(transcript, has_context) else FAST
+        if tier == LARGE:
+            recent = self.recent_first_token(LARGE)
+            if recent is not None and recent > self.latency_target:
+                with self._lock:
+                    self._since_probe += 1
+                    probe = self._since_probe >= CASCADE_PROBE_EVERY
+                    if probe:
+                        self._since_probe = 0
+                    else:
+                        self.downgrades += 1
+                if not probe:
+                    print(f"⏱️ Large model first token p50 {recent:.1f}s > {self.latency_target:.1f}s budget, using the fast tier.")
+                    tier = FAST
+        with self._lock:
+            self.counts[tier]["chosen"] += 1
+        return tier
+
+    def first_token_timer(self, tier):
+        """Returns an on_first_token callback that records this tier's first-token latency."""
+        started = time.monotonic()
+
+        def record():
+            with self._lock:
+                self.first_token[tier].add(time.monotonic() - started)
+
+        return record
+
+    def answered(self, tier, escalated=False):
+        with self._lock:
+            self.counts[tier]["answered"] += 1
+            if escalated:
+                self.escalations += 1
+        tracing.annotate(model_tier=tier, escalated=escalated)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tiers": {
+                    name: {**self.counts[name], "first_token": self.first_token[name].percentiles()}
+                    for name in self.tiers
+                },
+                "escalations": self.escalations,
+                "downgrades": self.downgrades,
+            }
+
+    def print_stats(self):
+        stats = self.stats()
+        if not any(tier["chosen"] for tier in stats["tiers"].values()):
+            return
+        print("\n🪜 Model tiers:")
+        for name, tier in stats["tiers"].items():
+            p50 = tier["first_token"].get("p50")
+            latency = f", first token p50 {p50:.2f}s" if p50 is not None else ""
+            print(f"  {name:<6} {self.tiers[name]['model']}: chosen {tier['chosen']}, answered {tier['answered']}{latency}")
+        print(f"  escalations {stats['escalations']}, latency downgrades {stats['downgrades']}")
+
+
+CASCADE = ModelCascade()
+diagnostics.register_source("cascade", CASCADE.stats)
+atexit.register(CASCADE.print_stats)
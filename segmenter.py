@@ -0,0 +1,156 @@
+from utils2 import TTS_MIN_WORDS, TTS_FIRST_CHUNK_MIN_CHARS, TTS_MAX_CHUNK_CHARS
+
+# --- STREAMING SENTENCE SEGMENTER ---
+# Splits streamed LLM tokens into speakable chunks. Every character is
+# scanned once as it arrives; a '.', '!' or '?' only ends a sentence once the
+# following character turns out to be whitespace, so "3.5" and "Dr. Smith"
+# stay together. The very first chunk may be cut early at a clause boundary
+# (comma, semicolon, conjunction) so the first audio starts sooner.
+# "No." and "Co." are only abbreviations before a number or a name ("No. 5",
+# "Acme Co. Ltd"), so they are decided by the first character of the next word.
+
+SENTENCE_END = ".!?"
+CLOSERS = "\"')]”’"
+CLAUSE_PUNCT = ",;:"
+ABBREVIATIONS = {
+    "dr", "mr", "mrs", "ms", "prof", "sr", "jr", "st", "mt", "vs", "etc",
+    "e.g", "i.e", "a.m", "p.m", "u.s", "approx", "fig", "inc", "ltd",
+}
+CONDITIONAL_ABBREVIATIONS = {"no", "co"}
+CONJUNCTIONS = {"and", "but", "so", "because", "or", "which", "while", "although", "though"}
+
+
+class SentenceSegmenter:
+    def __init__(self, min_words=TTS_MIN_WORDS, first_chunk_min_chars=TTS_FIRST_CHUNK_MIN_CHARS,
+                 max_chars=TTS_MAX_CHUNK_CHARS):
+        self.min_words = min_words
+        self.first_chunk_min_chars = first_chunk_min_chars
+        self.max_chars = max_chars
+        self.chunks_emitted = 0
+        self._reset()
+
+    def _reset(self):
+        self._chars = []
+        self._words = 0           # completed words in the buffer
+        self._word = []           # the word currently being scanned
+        self._word_start = 0
+        self._pending_end = False # saw a terminator, waiting for the next char
+        self._pending_word = None # "No"/"Co" before that terminator
+        self._tentative_end = -1  # buffer index of a "No." / "Co." end awaiting the next word
+        self._last_clause = -1    # buffer index just after the latest clause boundary
+        self._last_space = -1
+
+    def feed(self, text):
+        """Consumes a streamed token and returns the chunks that are ready to speak."""
+        chunks = []
+        for ch in text:
+            self._scan(ch, chunks)
+        return chunks
+
+    def flush(self):
+        """Returns whatever is left at the end of the stream (or None)."""
+        text = "".join(self._chars).strip()
+        self._reset()
+        if text:
+            self.chunks_emitted += 1
+            return text
+        return None
+
+    # --- SCANNER ---
+    def _scan(self, ch, chunks):
+        if self._tentative_end >= 0 and not ch.isspace():
+            index, word = self._tentative_end, self._pending_word
+            self._tentative_end, self._pending_word = -1, None
+            if not self._abbreviation_continues(word, ch) and self._words >= self.min_words:
+                self._emit(index, chunks)
+
+        if self._pending_end:
+            if ch in SENTENCE_END or ch in CLOSERS:
+                # "?!", "..." or a closing quote still belong to the sentence
+                self._append(ch)
+                return
+            self._pending_end = False
+            if ch.isspace() and self._pending_word is not None:
+                self._tentative_end = len(self._chars)
+            elif ch.isspace() and self._words + 1 >= self.min_words:
+                self._complete_word()
+                self._emit(len(self._chars), chunks)
+                return
+
+        if ch.isspace():
+            self._on_space(chunks)
+            self._chars.append(ch)
+            self._last_space = len(self._chars)
+        else:
+            if ch in SENTENCE_END and not self._is_abbreviation(ch):
+                self._pending_end = True
+                word = "".join(self._word)
+                self._pending_word = word if ch == "." and word.lower() in CONDITIONAL_ABBREVIATIONS else None
+            self._append(ch)
+
+        if len(self._chars) >= self.max_chars:
+            split_at = self._last_clause if self._last_clause > 0 else self._last_space
+            if split_at > 0:
+                self._emit(split_at, chunks)
+
+    def _append(self, ch):
+        if not self._word:
+            self._word_start = len(self._chars)
+        self._word.append(ch)
+        self._chars.append(ch)
+
+    def _complete_word(self):
+        word = "".join(self._word)
+        self._word = []
+        if word:
+            self._words += 1
+        return word
+
+    def _is_abbreviation(self, ch):
+        if ch != ".":
+            return False
+        word = "".join(self._word).lower()
+        # "Dr." / "e.g." / single initials like "J." (but not "I.")
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha() and word != "i")
+
+    @staticmethod
+    def _abbreviation_continues(word, ch):
+        """Whether "No." / "Co." was an abbreviation, judged by the next word's first character."""
+        return ch.isdigit() or (word == "Co" and ch.isupper())
+
+    def _on_space(self, chunks):
+        word_start = self._word_start
+        word = self._complete_word()
+        if not word:
+            return
+
+        if word[-1] in CLAUSE_PUNCT:
+            self._last_clause = len(self._chars)
+            if self._can_split_early(len(self._chars)):
+                self._emit(len(self._chars), chunks)
+        elif word.lower() in CONJUNCTIONS and word_start > 0:
+            self._last_clause = word_start
+            if self._can_split_early(word_start):
+                # Keep the conjunction with the clause it introduces
+                self._emit(word_start, chunks)
+
+    def _can_split_early(self, index):
+        return self.chunks_emitted == 0 and index >= self.first_chunk_min_chars
+
+    def _emit(self, index, chunks):
+        text = "".join(self._chars[:index]).strip()
+        rest = self._chars[index:]
+
+        in_word = bool(self._word)
+        word, word_start = self._word, self._word_start - index
+        pending_end = self._pending_end
+        self._reset()
+        self._chars = rest
+        self._pending_end = pending_end
+        self._words = len("".join(rest).split()) - (1 if in_word else 0)
+        if in_word:
+            self._word, self._word_start = word, word_start
+
+        if text:
+            self.chunks_emitted += 1
+            chunks.append(text)
@@ -0,0 +1,50 @@
+import json
+import struct
+
+# --- CLIENT/SERVER WIRE FORMAT ---
+# Every message is: 1-byte type, 4-byte big-endian payload length, payload.
+#
+# client -> server                       server -> client
+#   HELLO  {"user": name}                  WELCOME {"session": id} or {"error": ...}
+#   AUDIO  16-bit mono PCM @ 16 kHz        EVENT   {"transcript"|"say"|"state"|"busy": ...}
+#   TEXT   {"text": ...} (skips STT)       PCM     16-bit mono PCM @ TTS_SAMPLE_RATE
+#   BYE    {}                              END     {"result": ...} (turn finished)
+HELLO = b"H"
+AUDIO = b"A"
+TEXT = b"X"
+BYE = b"B"
+WELCOME = b"W"
+EVENT = b"T"
+PCM = b"P"
+END = b"E"
+
+HEADER = struct.Struct(">cI")
+MAX_PAYLOAD = 4 * 1024 * 1024
+
+
+def encode(kind, payload=b""):
+    if not isinstance(payload, (bytes, bytearray)):
+        payload = json.dumps(payload).encode()
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+async def read_message(reader):
+    """Returns (kind, payload bytes), or (None, None) when the peer has gone away."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+        kind, length = HEADER.unpack(header)
+        if length > MAX_PAYLOAD:
+            raise ValueError(f"message too large ({length} bytes)")
+        payload = await reader.readexactly(length)
+    except (ConnectionError, EOFError, ValueError):
+        # asyncio.IncompleteReadError is an EOFError
+        return None, None
+    return kind, payload
+
+
+def decode_json(payload):
+    """Decodes a JSON object payload; raises ValueError for anything else."""
+    message = json.loads(payload or b"{}")
+    if not isinstance(message, dict):
+        raise ValueError("expected a JSON object")
+    return message
@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import tempfile
+import builtins
+import threading
+import _thread
+import statistics
+
+# --- LONG-RUNNING SOAK TEST ---
+# Runs the real mainwakeword2.main() loop for hours against simulated audio:
+# a fake Porcupine that "hears" the wake word, FakePyAudio replaying a speech
+# fixture for every command and the stub Ollama/Tavily from benchmark.py.
+# Everything between them is the real code: record_command, Whisper
+# (stt_tts2.transcribe_audio), stt_tts2.speak, tts_backends' synthesizer
+# slot and the audio_output engine, whose PyAudio stream is FakePyAudio's
+# output side. Scripted turns cycle through local tools, chat, search and
+# the reminder add/complete/view paths, ending each conversation so the wake
+# loop and its streams are exercised too.
+#
+# Not exercised: the microphone and speaker hardware, the Porcupine engine,
+# and a real TTS voice (SoakSynthesizer streams silence as long as the text
+# would take to say, through the same Synthesizer interface). The fixture is
+# noise, so Whisper still decodes every command but its transcript is
+# replaced by the scripted line; --scripted-stt skips the decode entirely.
+#
+# A sampler thread records RSS, open FDs, thread count and turn latency. At
+# the end every series is fitted with a least-squares line against the number
+# of turns completed (leaks grow with work done, not wall time); a slope above
+# its threshold fails the run. Offline, Linux only (/proc).
+#
+#   python soak_test.py --hours 4 --speed 20
+#   python soak_test.py --minutes 5 --out soak_samples.jsonl   # quick check
+
+# The harness must never touch the real trace file, Tavily, Ollama or Porcupine
+os.environ["ALEX_TRACE_FILE"] = ""
+os.environ.setdefault("TAVILY_API_KEY", "tvly-offline-soak")
+os.environ.setdefault("PORCUPINE_ACCESS_KEY", "offline-soak")
+os.environ.setdefault("OLLAMA_API_URL", "http://127.0.0.1:9")  # replaced by the stub's address
+os.environ["ALEX_DIAG_SOCKET"] = ""
+
+from benchmark import FakePyAudio, StubOllama, StubTavily, make_fixture, read_wav_pcm, setup_database
+import diagnostics
+import tracing
+import tts_backends
+
+SOAK_USER = "Bench"
+WAKE_AFTER_SECONDS = 0.5    # simulated audio before the fake Porcupine fires
+
+# (transcript, intent reply from the stub LLM or None when a local tool answers)
+SCRIPT = [
+    ("what time is it", None),
+    ("tell me something fun about octopuses", {"intent": "CHAT"}),
+    ("remind me to buy batteries tomorrow", {"intent": "ADD_REMINDER", "description": "buy batteries", "due_date": "tomorrow"}),
+    ("convert 5 miles to kilometers", None),
+    ("search the weather in Paris", {"intent": "SEARCH", "search_query": "weather in Paris"}),
+    ("I bought the batteries", {"intent": "COMPLETE", "reminder": "batteries"}),
+    ("what's on my list", {"intent": "VIEW"}),
+    ("that's all", None),
+]
+
+# Allowed growth per 1000 turns before the run fails
+THRESHOLDS = {
+    "rss_mb": 5.0,
+    "open_fds": 1.0,
+    "threads": 1.0,
+    "turn_seconds": 0.1,
+}
+
+
+# --- FAKE WAKE WORD ENGINE ---
+class FakePorcupine:
+    """pvporcupine handle that fires once every time the wake loop has read WAKE_AFTER_SECONDS of audio."""
+
+    sample_rate = 16000
+    frame_length = 512
+
+    def __init__(self):
+        self.frames = 0
+
+    def process(self, pcm):
+        self.frames += self.frame_length
+        if self.frames >= WAKE_AFTER_SECONDS * self.sample_rate:
+            self.frames = 0
+            return 0
+        return -1
+
+    def delete(self):
+        pass
+
+
+def fake_porcupine_module():
+    module = types.ModuleType("pvporcupine")
+    module.create = lambda **kwargs: FakePorcupine()
+    return module
+
+
+# --- STAND-IN VOICE ---
+class SoakSynthesizer(tts_backends.Synthesizer):
+    """Streams silence for as long as the text would take to say at `words_per_second`."""
+    name = "soak"
+
+    def __init__(self, words_per_second):
+        self.words_per_second = words_per_second
+
+    def stream(self, text):
+        remaining = int(len(text.split()) / self.words_per_second * self.native_rate) * 2
+        while remaining > 0:
+            size = min(tts_backends.READ_BYTES, remaining)
+            remaining -= size
+            yield bytes(size)
+
+
+# --- SCRIPTED AUDIO + STT ---
+class ScriptedSession:
+    """
+    Feeds the conversation: every command recording gets the speech fixture,
+    and the transcriber returns the next scripted line (setting the stub
+    LLM's intent reply to match). With `stt` the recording is decoded by it
+    first, so Whisper runs on every turn even though its text is discarded.
+    """
+
+    def __init__(self, stub, fake_pa, fixture_pcm, command_frames, stt=None):
+        self.stub = stub
+        self.fake_pa = fake_pa
+        self.fixture_pcm = fixture_pcm
+        self.command_frames = command_frames
+        self.stt = stt
+        self.position = 0
+
+        original_open = fake_pa.open
+
+        def open_stream(rate, frames_per_buffer=1024, input=False, **kwargs):
+            if input and frames_per_buffer == self.command_frames:
+                # record_command is listening: the user says the next line
+                self.fake_pa.queue_pcm(self.fixture_pcm)
+            return original_open(rate, frames_per_buffer=frames_per_buffer, input=input, **kwargs)
+
+        fake_pa.open = open_stream
+
+    def transcribe(self, audio_io, sample_rate):
+        if self.stt is not None:
+            self.stt(audio_io, sample_rate)
+        transcript, intent = SCRIPT[self.position % len(SCRIPT)]
+        self.position += 1
+        if intent is not None:
+            self.stub.generate_reply = intent
+        return transcript
+
+
+# --- SAMPLING ---
+def open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+class Sampler(threading.Thread):
+    def __init__(self, interval, deadline, out_path=None):
+        super().__init__(name="soak-sampler", daemon=True)
+        self.interval = interval
+        self.deadline = deadline
+        self.out_path = out_path
+        self.samples = []
+        self.turn_seconds = []
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def record_turn(self, record):
+        with self.lock:
+            self.turn_seconds.append(record["metrics"].get("turn_total", 0.0))
+
+    def take_sample(self):
+        with self.lock:
+            recent, self.turn_seconds = self.turn_seconds, []
+        rss = diagnostics.rss_bytes()
+        sample = {
+            "elapsed": round(time.monotonic() - self.started, 1),
+            "turns": tracing.turn_count(),
+            "rss_mb": round(rss / 2**20, 2) if rss is not None else None,
+            "open_fds": open_fds(),
+            "threads": threading.active_count(),
+            "turn_seconds": round(statistics.median(recent), 4) if recent else None,
+        }
+        self.samples.append(sample)
+        if self.out_path:
+            with open(self.out_path, "a") as f:
+                f.write(json.dumps(sample) + "\n")
+        print(f"🧪 {sample}")
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            time.sleep(min(self.interval, max(0.0, self.deadline - time.monotonic())))
+            self.take_sample()
+        # Same path as Ctrl+C: utils2.handle_interrupt exits main() through its cleanup
+        _thread.interrupt_main()
+
+
+# --- TREND ANALYSIS ---
+def slope(points):
+    """Least-squares slope of [(x, y)]; None with fewer than 3 distinct x values."""
+    if len({x for x, _ in points}) < 3:
+        return None
+    mean_x = statistics.fmean(x for x, _ in points)
+    mean_y = statistics.fmean(y for _, y in points)
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return numerator / denominator if denominator else 0.0
+
+
+def analyse(samples, warmup, thresholds=THRESHOLDS):
+    """Returns (report lines, failures). The first `warmup` fraction of samples is ignored."""
+    steady = samples[int(len(samples) * warmup):]
+    lines, failures = [], []
+    for metric, limit in thresholds.items():
+        points = [(s["turns"], s[metric]) for s in steady if s[metric] is not None]
+        growth = slope(points)
+        if growth is None:
+            lines.append(f"  {metric:<14} not enough samples")
+            continue
+        per_thousand = growth * 1000
+        first, last = points[0][1], points[-1][1]
+        verdict = "FAIL" if per_thousand > limit else "ok"
+        lines.append(f"  {metric:<14} {first:>10.3f} -> {last:<10.3f} {per_thousand:+9.3f} per 1000 turns "
+                     f"(limit {limit:g})  {verdict}")
+        if verdict == "FAIL":
+            failures.append(metric)
+    return lines, failures
+
+
+# --- DRIVER ---
+def run(args):
+    sys.modules["pvporcupine"] = fake_porcupine_module()
+
+    import pyaudio
+    import stt_tts2
+    import mainwakeword2
+    import ai_corestreaming2
+
+    if not args.scripted_stt and stt_tts2.WHISPER_MODEL is None:
+        print("❌ The Whisper model did not load; fix that or run with --scripted-stt.")
+        return None
+
+    stub = StubOllama(args.first_token_delay, args.token_rate)
+    stub.start()
+    ai_corestreaming2.TAVILY_CLIENT = StubTavily()
+
+    with tempfile.TemporaryDirectory(prefix="soak-") as workdir:
+        setup_database(os.path.join(workdir, "soak.db"))
+        fixture = os.path.join(workdir, "command.wav")
+        make_fixture(fixture, speech_seconds=1.5, lead_silence=0.3)
+        try:
+            return _soak(args, stub, mainwakeword2, stt_tts2, pyaudio, read_wav_pcm(fixture))
+        finally:
+            stub.stop()
+
+
+def _soak(args, stub, mainwakeword2, stt_tts2, pyaudio, fixture_pcm):
+    fake_pa = FakePyAudio(speed=args.speed)
+    stt = None if args.scripted_stt else stt_tts2.transcribe_audio
+    session = ScriptedSession(stub, fake_pa, fixture_pcm, mainwakeword2.CHUNK_SIZE, stt)
+
+    # Wire the fakes into the real main loop; audio_output opens its stream on the same fake device
+    pyaudio.PyAudio = lambda: fake_pa
+    tts_backends._synthesizer = SoakSynthesizer(args.speech_rate)
+    mainwakeword2.get_keyword_path = lambda: "offline-soak.ppn"
+    mainwakeword2.transcribe_audio = session.transcribe
+    builtins.input = lambda prompt="": SOAK_USER
+
+    deadline = time.monotonic() + args.seconds
+    sampler = Sampler(args.sample_interval, deadline, args.out)
+    original_end_turn = tracing.end_turn
+
+    def end_turn(**fields):
+        record = original_end_turn(**fields)
+        if record is not None:
+            sampler.record_turn(record)
+        return record
+
+    tracing.end_turn = end_turn
+
+    stt_mode = "scripted STT" if args.scripted_stt else "Whisper on every command"
+    print(f"🧪 Soak test: {args.seconds / 60:.0f} min at {args.speed:g}x audio speed, {stt_mode}, "
+          f"sampling every {args.sample_interval:g}s.")
+    sampler.take_sample()
+    sampler.start()
+    try:
+        mainwakeword2.main()
+    except (SystemExit, KeyboardInterrupt):
+        pass
+
+    return sampler.samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the assistant loop for hours offline and check for resource growth.")
+    parser.add_argument("--hours", type=float, default=0.0)
+    parser.add_argument("--minutes", type=float, default=0.0)
+    parser.add_argument("--speed", type=float, default=20.0, help="simulated audio speed vs real time")
+    parser.add_argument("--sample-interval", type=float, default=30.0, help="seconds between resource samples")
+    parser.add_argument("--warmup", type=float, default=0.1, help="fraction of samples ignored as warm-up")
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--speech-rate", type=float, default=3.0, help="words/s of the stand-in voice (played at --speed)")
+    parser.add_argument("--scripted-stt", action="store_true", help="skip the Whisper decode (quick runs, no model)")
+    parser.add_argument("--out", help="append every sample to this JSON-lines file")
+    for metric, limit in THRESHOLDS.items():
+        parser.add_argument(f"--max-{metric.replace('_', '-')}", type=float, default=limit,
+                            help=f"allowed {metric} growth per 1000 turns")
+    args = parser.parse_args()
+    if args.speech_rate <= 0:
+        parser.error("--speech-rate must be greater than 0")
+
+    args.seconds = (args.hours * 60 + args.minutes) * 60 or 3600.0
+    if not os.path.isdir("/proc/self/fd"):
+        print("❌ The soak test reads /proc; run it on Linux.")
+        return 2
+
+    samples = run(args)
+    if samples is None:
+        return 2
+    thresholds = {metric: getattr(args, f"max_{metric}") for metric in THRESHOLDS}
+    lines, failures = analyse(samples, args.warmup, thresholds)
+
+    turns = samples[-1]["turns"] if samples else 0
+    print(f"\n🧪 Soak summary: {turns} turns, {len(samples)} samples")
+    print("\n".join(lines))
+    if failures:
+        print(f"❌ Upward trend in: {', '.join(failures)}")
+        return 1
+    print("✅ No resource or latency growth beyond thresholds.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
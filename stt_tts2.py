@@ -1,66 +1,112 @@
-import io
 import pyaudio
-import struct
 import time
 import numpy as np 
-import os
 import whisper 
-import wave
+import threading
+import tracing
+import diagnostics
+from governor import GOVERNOR
 
 # Update imports to use the new file name
-from utils2 import SILENCE_THRESHOLD, SILENCE_DURATION, CHUNK_DURATION 
+from utils2 import (
+    CHUNK_DURATION, WHISPER_MODEL_SIZE,
+    WHISPER_LANGUAGE, WHISPER_TEMPERATURE, WHISPER_BEAM_SIZE, MIN_SPEECH_DURATION,
+    NO_SPEECH_THRESHOLD, LOGPROB_THRESHOLD, TTS_START_TIMEOUT,
+)
+from endpointing import Endpointer, trim_silence
 
-# Imports for gTTS and Pygame
-from gtts import gTTS
-import pygame
+# Imports for the synthesizer backends and the in-memory output engine
+from tts_backends import get_synthesizer
+from audio_output import get_output
 
 # --- AUDIO CONSTANTS AND CALCULATIONS (Made Local) ---
 SAMPLE_RATE = 16000 
 CHUNK_SIZE = int(SAMPLE_RATE * CHUNK_DURATION) 
-SILENCE_CHUNKS = int(SILENCE_DURATION / CHUNK_DURATION)
 
 # --- GLOBAL INITIALIZATION ---
-# Load Whisper Model (Choose a model size, "base" is recommended for local CPU)
+# Load Whisper Model (size set by WHISPER_MODEL_SIZE in utils2)
 print("Loading Whisper Model...")
 try:
-    WHISPER_MODEL = whisper.load_model("base") 
+    WHISPER_MODEL = whisper.load_model(WHISPER_MODEL_SIZE) 
     print("Whisper model loaded.")
 except Exception as e:
     print(f"❌ Could not load Whisper model: {e}")
     WHISPER_MODEL = None
 
-# TTS INITIALIZATION: Initialize Pygame Mixer for audio playback
-pygame.mixer.init()
+# whisper.decode() installs kv-cache hooks on the model's shared decoder
+# modules, so two decodes on one model at once corrupt each other's cache
+WHISPER_LOCK = threading.Lock()
+
+# Pinned decoding: English only (no detection pass), one temperature (no
+# fallback re-decodes), fp16 only where it is supported (no CPU warning)
+DECODE_OPTIONS = {
+    "language": WHISPER_LANGUAGE,
+    "task": "transcribe",
+    "temperature": WHISPER_TEMPERATURE,
+    "beam_size": WHISPER_BEAM_SIZE,
+    "fp16": WHISPER_MODEL is not None and WHISPER_MODEL.device.type == "cuda",
+    "without_timestamps": True,
+}
 
 # --- TEXT TO SPEECH (TTS) ---
 def speak(text):
     """
-    Speaks the given text using gTTS (Requires Internet).
-    This function is NON-BLOCKING once the audio is loaded.
+    Speaks the given text with the configured synthesizer (offline Piper or
+    eSpeak NG when available, gTTS otherwise). Audio is streamed to the
+    shared output engine as it is synthesized; this call blocks until the
+    clip has finished playing.
     """
     print(f"🗣️ Speaking: {text}")
     
-    try:
-        # Create a gTTS object
-        tts = gTTS(text=text, lang='en', slow=False)
-        temp_file = "temp_tts.mp3"
+    with GOVERNOR.during("speaking"):
+        try:
+            # Stream synthesized PCM straight onto the persistent output stream
+            output = get_output()
+            item = output.play(_timed_synthesis(get_synthesizer().stream(text), tracing.current_turn()))
+            if not item.started.wait(TTS_START_TIMEOUT):
+                # Playback thread stuck or dead: don't hang the main loop, and don't let it play late
+                output.stop()
+                item.error = TimeoutError(f"no audio after {TTS_START_TIMEOUT:g}s")
+                raise item.error
+            tracing.mark_once("first_audio")
         
-        # Save audio to a temporary file
-        tts.save(temp_file)
+            play_start = time.monotonic()
+            item.wait()
+            tracing.add_duration("playback", time.monotonic() - play_start)
         
-        # Load and play the audio using Pygame
-        pygame.mixer.music.load(temp_file)
-        pygame.mixer.music.play()
+            if item.error:
+                raise item.error
         
-        # Wait until playback finishes (blocking call to ensure audio completes)
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
-            
-        # Clean up
-        os.remove(temp_file)
-        
-    except Exception as e:
-        print(f"❌ gTTS/Pygame playback failed (Do you have internet access?): {e}")
+        except Exception as e:
+            print(f"❌ TTS playback failed: {e}")
+
+
+def _timed_synthesis(chunks, trace):
+    """
+    Keeps the tts_synth / first_synth measurements. The chunks are pulled on
+    the output engine's playback thread, so they are charged to the turn
+    that is speaking rather than to that thread's (empty) trace.
+    """
+    synth_seconds = 0.0
+    iterator = iter(chunks)
+    try:
+        while True:
+            synth_start = time.monotonic()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                synth_seconds += time.monotonic() - synth_start
+            if trace is not None:
+                trace.mark_once("first_synth")
+            yield chunk
+    finally:
+        # Stopped early (playback error): let the backend reap its subprocess now
+        if hasattr(iterator, "close"):
+            iterator.close()
+        if trace is not None:
+            trace.add_duration("tts_synth", synth_seconds)
 
 
 # --- SPEECH TO TEXT (STT) ---
@@ -77,48 +123,47 @@ def record_command(pa, sample_rate, chunk_size):
         input_device_index=None
     )
     
-    raw_audio = io.BytesIO()
-    silence_counter = 0
-    speaking = False
+    endpointer = Endpointer(sample_rate)
+    meter = diagnostics.input_meter("command")
+    meter.start(sample_rate, chunk_size)
     
     print("🎙️ Listening for command (Volume activated)...")
+    GOVERNOR.enter("listening")
     
-    while True:
-        try:
-            data = stream.read(chunk_size, exception_on_overflow=False)
-            raw_audio.write(data)
-
-            # --- Volume Check (Amplitude based) ---
-            audio_data = np.frombuffer(data, dtype=np.int16)
-            volume = np.max(np.abs(audio_data))
-            
-            if volume > SILENCE_THRESHOLD:
-                silence_counter = 0
-                if not speaking:
-                    speaking = True # Start recording only after first speech
-            else:
-                if speaking:
-                    silence_counter += 1
+    try:
+        while True:
+            try:
+                data = stream.read(chunk_size, exception_on_overflow=False)
+                meter.add(chunk_size)
             
-            # --- Stop Condition ---
-            if speaking and silence_counter >= SILENCE_CHUNKS:
-                print("🔇 Silence detected, stopping recording.")
-                break
+                # --- Stop Condition ---
+                if endpointer.feed(data):
+                    print("🔇 Silence detected, stopping recording.")
+                    break
                 
-        except IOError as e:
-            if e.errno == pyaudio.paInputOverflowed:
-                continue
-            else:
-                raise
+            except IOError as e:
+                if e.errno == pyaudio.paInputOverflowed:
+                    continue
+                else:
+                    raise
+    finally:
+        GOVERNOR.leave("listening")
         
+    meter.stop()
     stream.stop_stream()
     stream.close()
     
-    return raw_audio
+    return endpointer.audio
 
 def transcribe_audio(audio_io, sample_rate):
     """
     Transcribes the recorded audio buffer using the loaded Whisper model.
+    Can be called from several threads (the assistant server's workers), but
+    decodes are serialized on WHISPER_LOCK because they share one model; the
+    trimming before it runs in parallel. Silence around the speech is
+    trimmed first. Any clip that fits in one Whisper window (30 s, so in
+    practice every spoken command) is decoded with a single decode() call;
+    only longer ones go through transcribe()'s sliding-window loop.
     """
     global WHISPER_MODEL
 
@@ -126,27 +171,39 @@ def transcribe_audio(audio_io, sample_rate):
         print("❌ Whisper model is not loaded. Cannot transcribe.")
         return ""
     
-    # 1. Save audio data to a temporary WAV file for Whisper
-    temp_wav_path = "temp_recording.wav"
+    # 1. Keep only the speech (plus padding); nothing loud enough means nothing to transcribe
     audio_io.seek(0)
-    
-    with wave.open(temp_wav_path, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2) # 16-bit audio
-        wf.setframerate(sample_rate)
-        wf.writeframes(audio_io.read())
+    samples = trim_silence(np.frombuffer(audio_io.read(), dtype=np.int16), sample_rate)
+    if len(samples) < MIN_SPEECH_DURATION * sample_rate:
+        print("👂 No speech in the recording.")
+        return ""
 
-    # 2. Run Whisper transcription
-    try:
-        result = WHISPER_MODEL.transcribe(temp_wav_path)
-        transcript = result["text"].strip()
-        print(f"👂 Transcript: {transcript}")
-        
-    except Exception as e:
-        print(f"❌ Transcription failed: {e}")
-        transcript = ""
+    # 2. 16-bit PCM -> float32 in [-1, 1], which is what Whisper expects (16 kHz mono)
+    audio = samples.astype(np.float32) / 32768.0
+
+    # 3. Run Whisper transcription (one decode at a time on the shared model)
+    with WHISPER_LOCK, GOVERNOR.during("transcribing"):
+        try:
+            if len(audio) <= whisper.audio.N_SAMPLES:
+                # Everything up to 30 s, not just very short clips: one padded window costs the same either way
+                transcript = _decode_window(audio)
+            else:
+                options = {key: value for key, value in DECODE_OPTIONS.items() if key != "without_timestamps"}
+                result = WHISPER_MODEL.transcribe(audio, condition_on_previous_text=False, **options)
+                transcript = result["text"].strip()
+            print(f"👂 Transcript: {transcript}")
         
-    # 3. Clean up
-    os.remove(temp_wav_path)
+        except Exception as e:
+            print(f"❌ Transcription failed: {e}")
+            transcript = ""
 
     return transcript
+
+
+def _decode_window(audio):
+    """Decodes a clip that fits in one Whisper window (up to 30 s): one mel spectrogram, one decode() call."""
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=WHISPER_MODEL.dims.n_mels)
+    result = whisper.decode(WHISPER_MODEL, mel.to(WHISPER_MODEL.device), whisper.DecodingOptions(**DECODE_OPTIONS))
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return ""
+    return result.text.strip()
@@ -0,0 +1,230 @@
+import json
+import time
+import uuid
+import atexit
+import threading
+from collections import deque
+
+from utils2 import TRACE_FILE, TRACE_WINDOW
+
+# --- PER-TURN LATENCY TRACING ---
+# Each turn gets a correlation ID and a list of (stage, monotonic time) marks.
+# mark() is just a thread-local lookup plus a list append, so it is safe to
+# call on the hot path; all the maths happens once per turn in end_turn().
+
+# Headline metrics, all measured from the moment the user stopped speaking
+HEADLINE_METRICS = {
+    "time_to_transcript": "transcript",
+    "time_to_first_token": "first_token",
+    "time_to_first_audio": "first_audio",
+}
+ORIGIN_STAGE = "speech_end"
+
+_local = threading.local()
+_lock = threading.Lock()
+_trace_fp = None
+_turn_count = 0
+
+
+class RollingHistogram:
+    """Keeps the last `window` samples and computes percentiles on demand."""
+
+    def __init__(self, window=TRACE_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def add(self, value):
+        self.samples.append(value)
+
+    def percentiles(self, points=(50, 95, 99)):
+        if not self.samples:
+            return {}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {f"p{p}": ordered[min(last, round(p / 100 * last))] for p in points}
+
+
+_histograms = {}
+
+
+class TurnTrace:
+    def __init__(self, label=None, start=None):
+        now = time.monotonic()
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.start = now if start is None else start
+        self.wall_start = time.time() - (now - self.start)
+        self.marks = []
+        self.seen = set()
+        self.totals = {}
+        self.fields = {}
+
+    def mark_once(self, stage, at=None):
+        if stage not in self.seen:
+            self.seen.add(stage)
+            self.marks.append((stage, time.monotonic() if at is None else at))
+
+    def add_duration(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def metrics(self):
+        """Stage durations (time since the previous mark) plus the headline metrics."""
+        result = {}
+        previous = self.start
+        for stage, at in self.marks:
+            result[f"stage.{stage}"] = at - previous
+            previous = at
+        result["turn_total"] = previous - self.start
+
+        times = dict(reversed(self.marks))  # first occurrence wins
+        origin = times.get(ORIGIN_STAGE, self.start)
+        for metric, stage in HEADLINE_METRICS.items():
+            if stage in times:
+                result[metric] = times[stage] - origin
+
+        for name, seconds in self.totals.items():
+            result[f"total.{name}"] = seconds
+        return result
+
+
+# --- TURN LIFECYCLE ---
+def start_turn(label=None, start=None):
+    """
+    Starts a new trace for the current thread and returns it. `start` (a
+    time.monotonic() value) backdates the turn, e.g. to when it was queued.
+    """
+    trace = TurnTrace(label, start)
+    _local.trace = trace
+    return trace
+
+
+def current_turn():
+    return getattr(_local, "trace", None)
+
+
+def mark(stage):
+    """Records a stage boundary on the current turn (no-op outside a turn)."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.marks.append((stage, time.monotonic()))
+
+
+def mark_once(stage, at=None):
+    """
+    Like mark(), but only the first occurrence per turn is kept (first token,
+    first audio...). `at` (a time.monotonic() value) records a moment that
+    has already passed, for marks that are only confirmed later.
+    """
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.mark_once(stage, at)
+
+
+def add_duration(name, seconds):
+    """Accumulates time spent in a repeated stage (e.g. TTS synthesis per sentence)."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.add_duration(name, seconds)
+
+
+def turn_count():
+    """Turns recorded since start-up (or the last reset())."""
+    return _turn_count
+
+
+def annotate(**fields):
+    """Attaches extra fields (model tier, ...) to the current turn's record."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.fields.update(fields)
+
+
+def cancel_turn():
+    """Drops the current trace without recording it (e.g. a microphone bump)."""
+    _local.trace = None
+
+
+def end_turn(**fields):
+    """Closes the current turn, updates the histograms and writes one JSON line."""
+    global _turn_count
+
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return None
+    _local.trace = None
+
+    metrics = trace.metrics()
+    record = {
+        "turn_id": trace.turn_id,
+        "start": trace.wall_start,
+        "stages": [stage for stage, _ in trace.marks],
+        "metrics": {name: round(value, 4) for name, value in metrics.items()},
+    }
+    if trace.label:
+        record["label"] = trace.label
+    record.update(trace.fields)
+    record.update(fields)
+
+    with _lock:
+        _turn_count += 1
+        for name, value in metrics.items():
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = RollingHistogram()
+            histogram.add(value)
+        _write_record(record)
+
+    return record
+
+
+def _write_record(record):
+    global _trace_fp
+
+    if not TRACE_FILE:
+        return
+    try:
+        if _trace_fp is None:
+            _trace_fp = open(TRACE_FILE, "a")
+        _trace_fp.write(json.dumps(record) + "\n")
+        _trace_fp.flush()
+    except OSError as e:
+        print(f"⚠️ Could not write latency trace: {e}")
+
+
+# --- SUMMARY ---
+def summary():
+    """Returns {metric: {"count", "p50", "p95", "p99"}} over the rolling window."""
+    with _lock:
+        return {
+            name: {"count": len(histogram.samples), **histogram.percentiles()}
+            for name, histogram in sorted(_histograms.items())
+        }
+
+
+def reset():
+    """Clears all histograms (used by the benchmark between scenarios)."""
+    global _turn_count
+    with _lock:
+        _histograms.clear()
+        _turn_count = 0
+
+
+def print_summary():
+    stats = summary()
+    if not stats:
+        return
+
+    print(f"\n📊 Latency summary ({_turn_count} turns, seconds):")
+    print(f"  {'metric':<28}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, values in stats.items():
+        print(f"  {name:<28}{values['count']:>6}{values['p50']:>9.3f}{values['p95']:>9.3f}{values['p99']:>9.3f}")
+
+
+def _close():
+    global _trace_fp
+    print_summary()
+    if _trace_fp is not None:
+        _trace_fp.close()
+        _trace_fp = None
+
+
+atexit.register(_close)
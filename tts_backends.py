@@ -0,0 +1,188 @@
+import io
+import os
+import abc
+import json
+import shutil
+import struct
+import subprocess
+import numpy as np
+
+from utils2 import TTS_SAMPLE_RATE, TTS_BACKEND, TTS_VOICE, PIPER_MODEL
+
+# --- SYNTHESIZER INTERFACE ---
+# A synthesizer turns text into 16-bit mono PCM at TTS_SAMPLE_RATE and yields
+# it in chunks as soon as they exist, so playback can start on the first
+# frames. The offline backends (Piper, eSpeak NG) run as subprocesses and
+# stream from their stdout; gTTS is kept as an optional online backend.
+READ_BYTES = 4096
+
+
+class Synthesizer(abc.ABC):
+    name = "base"
+    native_rate = TTS_SAMPLE_RATE
+
+    @abc.abstractmethod
+    def stream(self, text):
+        """Yields PCM chunks (bytes) for text."""
+
+    def synthesize(self, text):
+        """Convenience wrapper returning the whole clip."""
+        return b"".join(self.stream(text))
+
+
+class StreamResampler:
+    """Linear resampler that keeps state between chunks (no clicks at boundaries)."""
+
+    def __init__(self, source_rate, target_rate):
+        self.step = source_rate / target_rate
+        self.position = 0.0
+        self.previous = None
+
+    def process(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        if self.previous is not None:
+            samples = np.concatenate(([self.previous], samples))
+        if len(samples) < 2:
+            return b""
+
+        positions = np.arange(self.position, len(samples) - 1, self.step)
+        output = np.interp(positions, np.arange(len(samples)), samples)
+
+        # Carry the fractional position over to the next chunk, which starts at our last sample
+        next_position = positions[-1] + self.step if len(positions) else self.position
+        self.position = next_position - (len(samples) - 1)
+        self.previous = samples[-1]
+        return output.astype(np.int16).tobytes()
+
+
+def _resampled(chunks, source_rate):
+    if source_rate == TTS_SAMPLE_RATE:
+        yield from chunks
+        return
+    resampler = StreamResampler(source_rate, TTS_SAMPLE_RATE)
+    for chunk in chunks:
+        out = resampler.process(chunk)
+        if out:
+            yield out
+
+
+def _even_chunks(pipe):
+    """Reads a PCM pipe without ever splitting a 16-bit sample across chunks."""
+    leftover = b""
+    while True:
+        data = pipe.read1(READ_BYTES) if hasattr(pipe, "read1") else pipe.read(READ_BYTES)
+        if not data:
+            return
+        data = leftover + data
+        cut = len(data) - (len(data) % 2)
+        leftover = data[cut:]
+        if cut:
+            yield data[:cut]
+
+
+# --- OFFLINE BACKENDS ---
+class PiperSynthesizer(Synthesizer):
+    """Piper neural TTS (https://github.com/rhasspy/piper), streamed as raw PCM."""
+    name = "piper"
+
+    def __init__(self, model_path=PIPER_MODEL):
+        self.binary = shutil.which("piper")
+        if not self.binary or not model_path or not os.path.exists(model_path):
+            raise RuntimeError("Piper needs the 'piper' binary on PATH and ALEX_PIPER_MODEL pointing at a .onnx voice.")
+        self.model_path = model_path
+        with open(model_path + ".json") as f:
+            self.native_rate = json.load(f)["audio"]["sample_rate"]
+
+    def stream(self, text):
+        process = subprocess.Popen(
+            [self.binary, "--model", self.model_path, "--output-raw"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        try:
+            process.stdin.write(text.encode() + b"\n")
+            process.stdin.close()
+            yield from _resampled(_even_chunks(process.stdout), self.native_rate)
+        finally:
+            process.stdout.close()
+            process.wait()
+
+
+class EspeakSynthesizer(Synthesizer):
+    """eSpeak NG formant synthesizer: tiny, fully offline, starts in milliseconds."""
+    name = "espeak"
+    native_rate = 22050
+
+    def __init__(self, voice=TTS_VOICE, words_per_minute=175):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if not self.binary:
+            raise RuntimeError("eSpeak NG is not installed (apt install espeak-ng).")
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+
+    def stream(self, text):
+        # The text goes in on stdin: as an argument, a reply like "-5 degrees" would be read as an option
+        process = subprocess.Popen(
+            [self.binary, "--stdout", "--stdin", "-v", self.voice, "-s", str(self.words_per_minute)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        try:
+            process.stdin.write(text.encode() + b"\n")
+            process.stdin.close()
+            # --stdout writes a streaming WAV: 44-byte header, then PCM as it is produced
+            header = process.stdout.read(44)
+            if len(header) < 44:
+                return
+            rate = struct.unpack_from("<I", header, 24)[0]
+            yield from _resampled(_even_chunks(process.stdout), rate)
+        finally:
+            process.stdout.close()
+            process.wait()
+
+
+# --- ONLINE BACKEND (optional) ---
+class GTTSSynthesizer(Synthesizer):
+    """Google TTS: needs the network and returns the whole clip at once."""
+    name = "gtts"
+
+    def __init__(self):
+        from gtts import gTTS
+        from audio_output import decode_mp3
+        self._gtts = gTTS
+        self._decode = decode_mp3
+
+    def stream(self, text):
+        mp3 = io.BytesIO()
+        self._gtts(text=text, lang='en', slow=False).write_to_fp(mp3)
+        yield self._decode(mp3.getvalue())
+
+
+BACKENDS = {
+    "piper": PiperSynthesizer,
+    "espeak": EspeakSynthesizer,
+    "gtts": GTTSSynthesizer,
+}
+AUTO_ORDER = ("piper", "espeak", "gtts")
+
+_synthesizer = None
+
+
+def create_synthesizer(name=TTS_BACKEND):
+    """Builds the named backend; 'auto' picks the first one that is available."""
+    if name != "auto":
+        return BACKENDS[name]()
+
+    for candidate in AUTO_ORDER:
+        try:
+            return BACKENDS[candidate]()
+        except Exception as e:
+            print(f"⚠️ TTS backend '{candidate}' unavailable: {e}")
+    raise RuntimeError("No TTS backend is available.")
+
+
+def get_synthesizer():
+    """Returns the process-wide synthesizer, creating it on first use."""
+    global _synthesizer
+    if _synthesizer is None:
+        _synthesizer = create_synthesizer()
+        print(f"🔊 TTS backend: {_synthesizer.name}")
+    return _synthesizer
@@ -8,8 +8,93 @@ CHUNK_DURATION = 0.5    # seconds per chunk
 SILENCE_THRESHOLD = 200 # Volume level to detect silence
 SILENCE_DURATION = 1.0  # seconds of silence needed to stop recording
 KEYWORD_FILENAME = "Hi-Alex_en_linux_v3_0_0.ppn"
-MODEL_NAME = "codestral:22b" 
+MODEL_NAME = "codestral:22b" # the large tier (see MODEL_TIERS)
 MAX_FOLLOWUP_TIME = 8.0 # seconds to wait for a follow-up command
+INTENT_SLOT_MAX_CHARS = 80 # longest search query / reminder text the intent call may return
+INTENT_MAX_TOKENS = 64  # num_predict for the intent call; a typical filled-in reply is 30-45 tokens
+SEARCH_MAX_RESULTS = 5  # Tavily results considered before compression
+SEARCH_CONTEXT_TOKEN_BUDGET = 300 # search context kept in the prompt (see context_compressor.py)
+COMPLETE_AMBIGUITY_RATIO = 0.8  # ask which reminder was meant if the runner-up matches this share of the best's words
+
+# --- MODEL CASCADE (see model_cascade.py) ---
+# Per-tier Ollama settings; "options" is passed through as the request's options
+MODEL_TIERS = {
+    "fast": {
+        "model": os.environ.get("ALEX_FAST_MODEL", "llama3.2:3b"),
+        "options": {"temperature": 0.7, "num_predict": 120, "num_ctx": 2048},
+        "timeout": 30,
+    },
+    "large": {
+        "model": MODEL_NAME,
+        "options": {"temperature": 0.7, "num_predict": 160, "num_ctx": 4096},
+        "timeout": 60,
+    },
+}
+CASCADE_COMPLEX_WORDS = 20      # turns longer than this go to the large tier
+CASCADE_LATENCY_TARGET = 2.5    # seconds; large tier p50 first token above this downgrades complex turns
+CASCADE_LATENCY_WINDOW = 20     # recent first-token times kept per tier
+CASCADE_MIN_SAMPLES = 3         # don't judge a tier's latency on fewer turns than this
+CASCADE_PROBE_EVERY = 5         # while downgrading, still send every Nth complex turn to the large tier
+INTENT_TIER = "fast"            # tier used for the structured intent call
+
+# --- WHISPER DECODING (see stt_tts2.transcribe_audio) ---
+WHISPER_MODEL_SIZE = "base"     # tiny, base, small, ... ("base" is recommended for local CPU)
+WHISPER_LANGUAGE = "en"         # fixed, so no language detection pass per utterance
+WHISPER_TEMPERATURE = 0.0       # a single temperature: no fallback re-decodes
+WHISPER_BEAM_SIZE = None        # None = greedy; e.g. 5 for beam search (slower, a bit more accurate)
+TRIM_FRAME_DURATION = 0.02      # seconds per frame when trimming silence before Whisper
+TRIM_PADDING = 0.2              # seconds of audio kept either side of the detected speech
+MIN_SPEECH_DURATION = 0.2       # trimmed clips shorter than this are not sent to Whisper
+NO_SPEECH_THRESHOLD = 0.6       # a decode above this no-speech probability...
+LOGPROB_THRESHOLD = -1.0        # ...and below this average log-prob counts as silence (as in whisper.transcribe())
+
+# --- TTS OUTPUT (see tts_backends.py) ---
+TTS_BACKEND = os.environ.get("ALEX_TTS_BACKEND", "auto")  # piper, espeak, gtts or auto (first available)
+TTS_VOICE = "en-us"             # eSpeak NG voice
+PIPER_MODEL = os.environ.get("ALEX_PIPER_MODEL", "")      # path to a Piper .onnx voice
+TTS_SAMPLE_RATE = 22050         # output stream rate; backends are decoded/resampled to it
+TTS_START_TIMEOUT = 10.0        # seconds speak() waits for the first samples to reach the speaker
+
+# --- TTS CHUNKING (see segmenter.py) ---
+TTS_MIN_WORDS = 3               # a sentence shorter than this is merged with the next one
+TTS_FIRST_CHUNK_MIN_CHARS = 20  # first chunk may end at a comma/conjunction after this many chars
+TTS_MAX_CHUNK_CHARS = 160       # force a split (at the last clause or space) past this length
+
+# --- ASSISTANT SERVER (see assistant_server.py) ---
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_WORKERS = 2              # turns (STT + LLM + TTS) processed at the same time
+SERVER_MAX_SESSIONS = 16        # connected clients; more are turned away
+SERVER_MAX_PENDING = 2          # queued utterances per session before new ones are dropped
+SERVER_MAX_QUEUE_WAIT = 10.0    # seconds an utterance may wait for a worker before it is dropped
+SERVER_ANNOUNCE_POLL = 0.25     # seconds between checks for due timer announcements
+SERVER_MAX_WRITE_BUFFER = 4 * 2**20  # bytes unsent to one client (~90 s of speech) before it is disconnected
+
+# --- RESOURCE GOVERNOR (see governor.py) ---
+# Most latency-critical phase first. Thread counts are fractions of the
+# machine's cores; vision_fps 0 pauses the camera publisher (for at most
+# frame_bus.BUS_MAX_PAUSE s unless the governor renews it, which it does
+# every GOVERNOR_PAUSE_RENEW s while the phase lasts). Vision niceness is not per
+# phase: bus processes lower their priority once at startup (frame_bus.VISION_NICE).
+GOVERNOR_ENABLED = os.environ.get("ALEX_GOVERNOR", "1") != "0"
+GOVERNOR_PHASES = {
+    "transcribing": {"vision_fps": 0.0,  "vision_threads": 0.25, "torch_threads": 1.0},
+    "generating":   {"vision_fps": 2.0,  "vision_threads": 0.25, "torch_threads": 0.25},
+    "speaking":     {"vision_fps": 5.0,  "vision_threads": 0.25, "torch_threads": 0.25},
+    "listening":    {"vision_fps": 5.0,  "vision_threads": 0.25, "torch_threads": 0.25},
+    "idle":         {"vision_fps": 15.0, "vision_threads": 0.5,  "torch_threads": 0.5},
+}
+GOVERNOR_ATTACH_RETRY = 10.0    # seconds between looks for a vision frame bus that isn't running yet
+GOVERNOR_PAUSE_RENEW = 10.0     # seconds between re-sends of a vision pause (well under frame_bus.BUS_MAX_PAUSE)
+
+# --- DIAGNOSTICS (see diagnostics.py) ---
+DIAG_SOCKET = os.environ.get("ALEX_DIAG_SOCKET", f"/tmp/alex-diag-{os.getuid()}.sock" if hasattr(os, "getuid") else "") # '' disables the socket
+PROFILE_INTERVAL = 0.01 # seconds between stack samples (100 Hz)
+PROFILE_DIR = "profiles" # folded-stack output, one file per profiling session
+
+# --- LATENCY TRACING ---
+TRACE_FILE = os.environ.get("ALEX_TRACE_FILE", "turn_traces.jsonl") # JSON-lines, one record per turn ('' disables)
+TRACE_WINDOW = 500      # turns kept in the rolling p50/p95/p99 histograms
 
 # --- SYSTEM PROMPT (Optimized for Conditional Follow-ups) ---
 SYSTEM_PROMPT = (